@@ -190,11 +190,11 @@ def resolve_roles(conn: sqlite3.Connection, user_agent: str, cik: str, access_no
     if not roles:
         return ok(([], "sec"))
 
-    cached = []
-    for role in set(roles):
-        result = db.queries.roles.insert_or_ignore(conn, access_no, role)
-        if is_ok(result):
-            cached.append(role)
+    # All of the filing's roles in one statement
+    unique_roles = list(set(roles))
+    result = db.queries.roles.insert_many(conn, [(access_no, role) for role in unique_roles])
+    rids = result[1] if is_ok(result) else {}
+    cached = [role for role in unique_roles if (access_no, role) in rids]
 
     return ok((cached, "sec"))
 
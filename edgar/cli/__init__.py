@@ -1,20 +1,16 @@
 # This directory is a Python package
-# Import all CLI modules for easy access
-from . import init
-from . import build
-from . import setup
-from . import add
-from . import new
-from . import probe
-from . import delete
-from . import select
-from . import update
-from . import report
-from . import calc
-from . import agg
-from . import format
-from . import modify
-from . import stats
-from . import export
-from . import shared
-from . import themes
+# CLI modules are imported on first attribute access (cli.report, cli.format,
+# ...), so a command only loads the modules it actually uses
+import importlib
+
+_MODULES = (
+    "init", "build", "setup", "add", "new", "probe", "delete", "select",
+    "update", "report", "calc", "agg", "format", "modify", "stats", "export",
+    "shared", "themes",
+)
+
+
+def __getattr__(name):
+    if name in _MODULES:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -78,7 +78,10 @@ def run_add_concept(cmd: Cmd, args) -> Result[None, str]:
     3. Derivation: --from Balance [filters...] (filters optional, AND logic)
     """
     try:
-        conn = sqlite3.connect(args.db_path)
+        result = db.store.connect(args.db_path)
+        if is_not_ok(result):
+            return result
+        conn = result[1]
 
         result = db.store.init(conn)
         if is_not_ok(result):
@@ -176,7 +179,10 @@ def run_add_role(cmd: Cmd, args) -> Result[None, str]:
     2. Derivation: --from Balance [filters...] (filters optional, AND logic)
     """
     try:
-        conn = sqlite3.connect(args.db_path)
+        result = db.store.connect(args.db_path)
+        if is_not_ok(result):
+            return result
+        conn = result[1]
 
         result = db.store.init(conn)
         if is_not_ok(result):
@@ -478,18 +484,11 @@ def link_patterns_to_group(conn: sqlite3.Connection,
                            patterns: list[dict], 
                            link_table: str) -> Result[int, str]:
     """
-    Link patterns to target group.
+    Link patterns to target group, in one statement and one commit.
     """
-    count = 0
-    for pattern in patterns:
-        if link_table == "group_concept_patterns":
-            result = db.queries.groups.link_concept_pattern(conn, target_group_id, pattern["pid"])
-        else:  # group_role_patterns
-            link_data = [{"gid": target_group_id, "pid": pattern["pid"]}]
-            result = db.store.insert_or_ignore(conn, link_table, link_data)
-
-        if is_not_ok(result):
-            return result
-        count += 1
+    link_data = [{"gid": target_group_id, "pid": pattern["pid"]} for pattern in patterns]
+    result = db.store.insert_or_ignore(conn, link_table, link_data)
+    if is_not_ok(result):
+        return result
 
-    return ok(count)
+    return ok(len(patterns))
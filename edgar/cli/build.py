@@ -3,6 +3,7 @@ CLI: build
 
 Build database from ep.toml configuration. Validates schema and extracts facts.
 """
+import os
 import sys
 import sqlite3
 from dataclasses import dataclass
@@ -189,8 +190,16 @@ def run_status(root, cfg: dict) -> Result[None, str]:
 
     print(f"Database: {db_path}")
 
-    # Connect to database
-    conn = sqlite3.connect(db_path)
+    # Status only reads, so it must not create a missing database file
+    if not os.path.exists(db_path):
+        print("Database not initialized. Run 'ep build' first.")
+        return ok(None)
+
+    # Connect to database (read-only: can run alongside a build)
+    result = db.store.connect(db_path, read_only=True)
+    if is_not_ok(result):
+        return result
+    conn = result[1]
 
     # Check if database is initialized
     result = db.store.select(conn, "SELECT name FROM sqlite_master WHERE type='table' AND name='groups'", ())
@@ -251,12 +260,9 @@ def run_status(root, cfg: dict) -> Result[None, str]:
             concept_patterns = result[1]
             pattern_ids = [p["pid"] for p in concept_patterns]
 
-            processed_count = 0
-            for filing in all_filings:
-                result = db.queries.filing_patterns_processed.is_fully_processed(
-                    conn, filing["access_no"], pattern_ids)
-                if is_ok(result) and result[1]:
-                    processed_count += 1
+            result = db.queries.filing_patterns_processed.count_fully_processed(
+                conn, [filing["access_no"] for filing in all_filings], pattern_ids)
+            processed_count = result[1] if is_ok(result) else 0
         else:
             processed_count = 0
 
@@ -341,7 +347,10 @@ def run_build(root, cfg: dict, groups: list[str]) -> Result[None, str]:
 
     # Connect to database
     user_agent = config.get_user_agent(cfg)
-    conn = sqlite3.connect(db_path)
+    result = db.store.connect(db_path)
+    if is_not_ok(result):
+        return result
+    conn = result[1]
 
     # Initialize database schema
     result = db.store.init(conn)
@@ -390,6 +399,7 @@ def run_build(root, cfg: dict, groups: list[str]) -> Result[None, str]:
 
     if not all_filings:
         conn.commit()
+        db.store.optimize(conn)
         conn.close()
         elapsed = datetime.now() - start_time
         print(f"✓ Build complete in {elapsed.total_seconds():.1f}s (no filings to process)")
@@ -420,6 +430,7 @@ def run_build(root, cfg: dict, groups: list[str]) -> Result[None, str]:
         return result
 
     conn.commit()
+    db.store.optimize(conn)
     conn.close()
 
     elapsed = datetime.now() - start_time
@@ -580,8 +591,7 @@ def extract_one(conn, cik: str, user_agent: str, cfg: dict, filing: dict,
     if not cached_roles:
         # Extract and cache roles from the already-loaded model
         roles = xbrl.arelle.extract_roles(model)
-        for role in set(roles):
-            db.queries.roles.insert_or_ignore(conn, access_no, role)
+        db.queries.roles.insert_many(conn, [(access_no, role) for role in set(roles)])
         roles_count = len(roles)
 
     # Now get role mappings (roles are guaranteed to be cached)
@@ -593,27 +603,28 @@ def extract_one(conn, cik: str, user_agent: str, cfg: dict, filing: dict,
     if not role_map:
         return ok({"inserted": 0, "roles": roles_count})
 
-    # Extract DEI once
+    # Extract DEI once; _update_filing writes it with each group's facts
     dei = xbrl.arelle.extract_dei(model, access_no)
-    result = db.queries.filings.insert_dei(conn, dei)
-    if is_not_ok(result):
-        return err(f"failed to insert DEI: {result[1]}")
 
     fiscal_period = dei.get("fiscal_period", "?")
     total_inserted = 0
 
+    # Patterns still to process for this filing, across all groups
+    all_pids = list(dict.fromkeys(pid for pids in group_pattern_map.values() for pid in pids))
+    result = db.queries.filing_patterns_processed.missing_pids(conn, access_no, all_pids)
+    missing = set(result[1]) if is_ok(result) else set(all_pids)
+
     # Process each group that has matching roles
     for group_name, pattern_ids in group_pattern_map.items():
         # Check if already processed for this group
-        result = db.queries.filing_patterns_processed.is_fully_processed(conn, access_no, pattern_ids)
-        if is_ok(result) and result[1]:
+        if missing.isdisjoint(pattern_ids):
             continue  # Already processed for this group
 
         # Check if this group has matching roles
         if group_name not in role_map:
             # Mark as processed even if no roles (fact doesn't exist in this filing)
-            for pid in pattern_ids:
-                db.queries.filing_patterns_processed.insert(conn, access_no, pid)
+            db.queries.filing_patterns_processed.insert_many(conn, [(access_no, pid) for pid in pattern_ids])
+            missing.difference_update(pattern_ids)
             continue
 
         # Filter role_map to just this group
@@ -634,48 +645,60 @@ def extract_one(conn, cik: str, user_agent: str, cfg: dict, filing: dict,
             total_inserted += stats["inserted"]
 
         # Mark as processed for this group (even if extraction failed)
-        for pid in pattern_ids:
-            db.queries.filing_patterns_processed.insert(conn, access_no, pid)
+        db.queries.filing_patterns_processed.insert_many(conn, [(access_no, pid) for pid in pattern_ids])
+        missing.difference_update(pattern_ids)
 
     return ok({"inserted": total_inserted, "roles": roles_count})
 
 
 def roles(conn, cik: str, roles_config: dict) -> Result[int, str]:
     """Populate role patterns from ep.toml (idempotent). Returns count inserted."""
-    for role_name, role_spec in roles_config.items():
-        pattern = role_spec["pattern"]
-        note = role_spec.get("note", "")
+    with db.store.transaction(conn):
+        for role_name, role_spec in roles_config.items():
+            pattern = role_spec["pattern"]
+            note = role_spec.get("note", "")
 
-        result = db.queries.role_patterns.insert(conn, cik, role_name, pattern, note)
-        if is_not_ok(result) and "already exists" not in result[1]:
-            return err(f"roles: failed to insert '{role_name}': {result[1]}")
+            result = db.queries.role_patterns.insert(conn, cik, role_name, pattern, note, commit=False)
+            if is_not_ok(result) and "already exists" not in result[1]:
+                conn.rollback()
+                return err(f"roles: failed to insert '{role_name}': {result[1]}")
 
     return ok(len(roles_config))
 
 
 def concepts(conn, cik: str, concepts_config: dict) -> Result[int, str]:
     """Populate concept patterns from ep.toml (idempotent). Returns count inserted."""
-    for concept_name, concept_spec in concepts_config.items():
-        uid = concept_spec["uid"]
-        pattern = concept_spec["pattern"]
-        note = concept_spec.get("note", "")
+    with db.store.transaction(conn):
+        for concept_name, concept_spec in concepts_config.items():
+            uid = concept_spec["uid"]
+            pattern = concept_spec["pattern"]
+            note = concept_spec.get("note", "")
 
-        result = db.queries.concept_patterns.insert(conn, cik, concept_name, pattern, uid, note)
-        if is_not_ok(result) and "already exists" not in result[1]:
-            return err(f"concepts: failed to insert '{concept_name}': {result[1]}")
+            result = db.queries.concept_patterns.insert(conn, cik, concept_name, pattern, uid, note, commit=False)
+            if is_not_ok(result) and "already exists" not in result[1]:
+                conn.rollback()
+                return err(f"concepts: failed to insert '{concept_name}': {result[1]}")
 
     return ok(len(concepts_config))
 
 
 def groups(conn, cik: str, cfg: dict, groups_to_process: list[str]) -> Result[None, str]:
     """Populate groups and link to roles/concepts from ep.toml (idempotent)."""
-    groups_config = cfg.get("groups", {})
+    with db.store.transaction(conn):
+        result = _link_groups(conn, cik, cfg.get("groups", {}), groups_to_process)
+        if is_not_ok(result):
+            conn.rollback()
+
+    return result
+
 
+def _link_groups(conn, cik: str, groups_config: dict, groups_to_process: list[str]) -> Result[None, str]:
+    """Insert and link the groups for groups(), without committing."""
     for group_name, group_spec in groups_config.items():
         if group_name not in groups_to_process:
             continue
 
-        result = db.queries.groups.insert_or_ignore(conn, group_name)
+        result = db.queries.groups.insert_or_ignore(conn, group_name, commit=False)
         if is_not_ok(result):
             return err(f"groups: failed to insert '{group_name}': {result[1]}")
 
@@ -699,7 +722,7 @@ def groups(conn, cik: str, cfg: dict, groups_to_process: list[str]) -> Result[No
                 return err(f"groups: role pattern '{role_name}' not found for '{group_name}'")
 
             link_data = [{"gid": gid, "pid": role_pattern["pid"]}]
-            result = db.store.insert_or_ignore(conn, "group_role_patterns", link_data)
+            result = db.store.insert_or_ignore(conn, "group_role_patterns", link_data, commit=False)
             if is_not_ok(result):
                 return err(f"groups: failed to link role '{role_name}' to '{group_name}': {result[1]}")
 
@@ -713,7 +736,7 @@ def groups(conn, cik: str, cfg: dict, groups_to_process: list[str]) -> Result[No
             if not concept_pattern:
                 return err(f"groups: concept uid={uid} not found for '{group_name}'")
 
-            result = db.queries.groups.link_concept_pattern(conn, gid, concept_pattern["pid"])
+            result = db.queries.groups.link_concept_pattern(conn, gid, concept_pattern["pid"], commit=False)
             if is_not_ok(result):
                 return err(f"groups: failed to link concept uid={uid} to '{group_name}': {result[1]}")
 
@@ -362,7 +362,10 @@ def run(cmd: Cmd, args) -> Result[Cmd | None, str]:
         
         if cmd["name"] in delete:
             if args.yes:
-                conn = sqlite3.connect(args.db_path)
+                result = db.store.connect(args.db_path)
+                if is_not_ok(result):
+                    return result
+                conn = result[1]
                 result = db.store.init(conn)
                 if is_not_ok(result):
                     conn.close()
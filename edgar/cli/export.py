@@ -104,11 +104,11 @@ def run(cmd: Cmd, args) -> Result[None, str]:
     db_path = config.get_db_path(root, cfg)
     ticker = args.ticker if args.ticker else config.get_ticker(cfg)
 
-    # Connect to database
-    try:
-        conn = sqlite3.connect(db_path)
-    except sqlite3.Error as e:
-        return err(f"cli.export.run: failed to connect to database: {e}")
+    # Connect to database (export only reads)
+    result = db.store.connect(db_path, read_only=True)
+    if is_not_ok(result):
+        return err(f"cli.export.run: failed to connect to database: {result[1]}")
+    conn = result[1]
 
     # Get entity CIK
     result = db.queries.entities.select(conn, tickers=[ticker])
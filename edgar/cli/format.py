@@ -15,7 +15,6 @@ from typing import Any
 
 # Local modules
 from edgar import cli
-from edgar import cli
 from edgar.cli.shared import Cmd
 from edgar.result import Result, ok, err, is_not_ok
 
@@ -24,43 +23,8 @@ from edgar.result import Result, ok, err, is_not_ok
 # FORMATTING FUNCTIONS
 # =============================================================================
 
-def as_csv(data: list[dict]) -> str:
-    """Format data as CSV string."""
-    if not data:
-        return ""
-
-    # Generate CSV string
-    if data:
-        output = io.StringIO()
-        # Collect all unique field names across all records (handles sparse data)
-        headers = []
-        seen = set()
-        for record in data:
-            for key in record.keys():
-                if key not in seen:
-                    headers.append(key)
-                    seen.add(key)
-        writer = csv.DictWriter(output, fieldnames=headers, lineterminator='\n')
-        writer.writeheader()
-        writer.writerows(data)
-        return output.getvalue().rstrip()  # Remove trailing newline
-    return ""
-
-
-def as_json(data: list[dict]) -> str:
-    """Format data as JSONL string (one object per line)."""
-    lines = []
-    for item in data:
-        lines.append(json.dumps(item))
-    return '\n'.join(lines)
-
-
-def as_tsv(data: list[dict]) -> str:
-    """Format data as gnuplot-friendly TSV with comment header."""
-    if not data:
-        return ""
-
-    # Collect all unique field names across all records (handles sparse data)
+def _headers(data: list[dict]) -> list[str]:
+    """Collect all unique field names across all records (handles sparse data)."""
     headers = []
     seen = set()
     for record in data:
@@ -68,22 +32,69 @@ def as_tsv(data: list[dict]) -> str:
             if key not in seen:
                 headers.append(key)
                 seen.add(key)
+    return headers
+
+
+def write_csv(data: list[dict], out) -> None:
+    """Write data as CSV to a text stream, one row at a time."""
+    if not data:
+        out.write("\n")
+        return
+
+    writer = csv.DictWriter(out, fieldnames=_headers(data), lineterminator='\n')
+    writer.writeheader()
+    writer.writerows(data)
 
-    # Build output lines
-    lines = []
 
-    # Add header line
-    lines.append("\t".join(headers))
+def write_json(data: list[dict], out) -> None:
+    """Write data as JSONL to a text stream (one object per line)."""
+    if not data:
+        out.write("\n")
+        return
+
+    for item in data:
+        out.write(json.dumps(item))
+        out.write("\n")
+
+
+def write_tsv(data: list[dict], out) -> None:
+    """Write data as gnuplot-friendly TSV to a text stream."""
+    if not data:
+        out.write("\n")
+        return
+
+    headers = _headers(data)
+    out.write("\t".join(headers))
+    out.write("\n")
 
-    # Add data rows
     for record in data:
         row = []
         for header in headers:
             value = record.get(header, "")
             row.append(str(value) if value is not None else "")
-        lines.append("\t".join(row))
+        out.write("\t".join(row))
+        out.write("\n")
 
-    return '\n'.join(lines)
+
+def as_csv(data: list[dict]) -> str:
+    """Format data as CSV string."""
+    output = io.StringIO()
+    write_csv(data, output)
+    return output.getvalue().rstrip()  # Remove trailing newline
+
+
+def as_json(data: list[dict]) -> str:
+    """Format data as JSONL string (one object per line)."""
+    output = io.StringIO()
+    write_json(data, output)
+    return output.getvalue().removesuffix("\n")
+
+
+def as_tsv(data: list[dict]) -> str:
+    """Format data as gnuplot-friendly TSV with comment header."""
+    output = io.StringIO()
+    write_tsv(data, output)
+    return output.getvalue().removesuffix("\n")
 
 
 def as_table(data: list[dict], theme_name: str = None) -> str:
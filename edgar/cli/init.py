@@ -4,7 +4,6 @@ CLI: init
 Interactive workspace initialization. Creates ep.toml configuration file.
 """
 import sys
-import sqlite3
 from pathlib import Path
 
 # Local modules
@@ -167,7 +166,10 @@ def run(cmd: Cmd, args) -> Result[None, str]:
     # Initialize empty database
     try:
         # Connect and initialize database schema
-        conn = sqlite3.connect(db_path)
+        result = db.store.connect(db_path)
+        if is_not_ok(result):
+            return result
+        conn = result[1]
         result = db.store.init(conn)
         if is_not_ok(result):
             conn.close()
@@ -81,7 +81,10 @@ def run_modify_group(cmd: Cmd, args) -> Result[Cmd | None, str]:
     """Modify group names or remove patterns with preview/execute workflow."""
 
     try:
-        conn = sqlite3.connect(args.db_path)
+        result = db.store.connect(args.db_path)
+        if is_not_ok(result):
+            return result
+        conn = result[1]
 
         result = db.store.init(conn)
         if is_not_ok(result):
@@ -321,7 +324,10 @@ def run_modify_role(cmd: Cmd, args) -> Result[Cmd | None, str]:
             return err(f"modify role: invalid regex pattern: {e}")
     
     try:
-        conn = sqlite3.connect(args.db_path)
+        result = db.store.connect(args.db_path)
+        if is_not_ok(result):
+            return result
+        conn = result[1]
         
         result = db.store.init(conn)
         if is_not_ok(result):
@@ -402,7 +408,10 @@ def run_modify_concept(cmd: Cmd, args) -> Result[Cmd | None, str]:
             return err(f"modify concept: invalid regex pattern: {e}")
     
     try:
-        conn = sqlite3.connect(args.db_path)
+        result = db.store.connect(args.db_path)
+        if is_not_ok(result):
+            return result
+        conn = result[1]
         
         result = db.store.init(conn)
         if is_not_ok(result):
@@ -6,7 +6,6 @@ Use 'add' command to link patterns to groups.
 """
 import re
 import sys
-import sqlite3
 
 # Local modules
 from edgar import config
@@ -94,7 +93,10 @@ def run_new_concept(cmd: Cmd, args) -> Result[None, str]:
         return err(f"new concept: invalid regex pattern: {e}")
 
     try:
-        conn = sqlite3.connect(args.db_path)
+        result = db.store.connect(args.db_path)
+        if is_not_ok(result):
+            return result
+        conn = result[1]
 
         result = db.store.init(conn)
         if is_not_ok(result):
@@ -164,7 +166,10 @@ def run_new_role(cmd: Cmd, args) -> Result[None, str]:
         return err(f"new role: invalid regex pattern: {e}")
 
     try:
-        conn = sqlite3.connect(args.db_path)
+        result = db.store.connect(args.db_path)
+        if is_not_ok(result):
+            return result
+        conn = result[1]
 
         result = db.store.init(conn)
         if is_not_ok(result):
@@ -226,7 +231,10 @@ def run_new_group(cmd: Cmd, args) -> Result[None, str]:
     Create a group, optionally derived from another group.
     """
     try:
-        conn = sqlite3.connect(args.db_path)
+        result = db.store.connect(args.db_path)
+        if is_not_ok(result):
+            return result
+        conn = result[1]
 
         result = db.store.init(conn)
         if is_not_ok(result):
@@ -44,7 +44,10 @@ def run(cmd: Cmd, args) -> Result[Cmd | None, str]:
     """
     
     try:
-        conn = sqlite3.connect(args.db_path)
+        result = db.store.connect(args.db_path)
+        if is_not_ok(result):
+            return result
+        conn = result[1]
         
         result = db.store.init(conn)
         if is_not_ok(result):
@@ -130,17 +133,27 @@ def probe_roles(conn: sqlite3.Connection, cmd: Cmd, args) -> Result[Cmd, str]:
     if not access_nos:
         return err("cli.probe.probe_roles: no access numbers provided. Use --access or pipe filing data.")
 
+    # CIKs and filing info for every filing up front, in one query each
+    result = db.queries.filings.get_ciks(conn, access_nos)
+    if is_not_ok(result):
+        return result
+    ciks = result[1]
+
+    result = db.queries.filings.get_many_with_entity(conn, access_nos)
+    if is_not_ok(result):
+        return result
+    filings_info = result[1]
+
     print(f"Processing {len(access_nos)} filing(s) for role discovery...", file=sys.stderr)
     results = []
     for i, access_no in enumerate(access_nos, 1):
         print(f"[{i:2d}/{len(access_nos)}] {access_no}...", end=" ", file=sys.stderr, flush=True)
 
         # Get CIK for this filing
-        result = db.queries.filings.get_cik(conn, access_no)
-        if is_not_ok(result) or not result[1]:
+        cik = ciks.get(access_no)
+        if not cik:
             print("skipped (no CIK)", file=sys.stderr)
             continue
-        cik = result[1]
 
         # Resolve roles for this filing (cache if missing)
         result = cache.resolve_roles(conn, user_agent, cik, access_no)
@@ -151,12 +164,11 @@ def probe_roles(conn: sqlite3.Connection, cmd: Cmd, args) -> Result[Cmd, str]:
         roles, _ = result[1]
         
         # Get filing info for context
-        result = db.queries.filings.get_with_entity(conn, access_no)
-        if is_not_ok(result) or not result[1]:
+        filing_info = filings_info.get(access_no)
+        if not filing_info:
             print("skipped (no filing info)", file=sys.stderr)
             continue
         
-        filing_info = result[1]
         print(f"cached {len(roles)} roles", file=sys.stderr)
         
         # Build results based on --list flag
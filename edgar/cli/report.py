@@ -57,15 +57,14 @@ def run(cmd: Cmd, args) -> Result[Cmd, str]:
         ok(Cmd) - Report data in wide format
         err(str) - Error occurred
     """
-    conn = sqlite3.connect(args.db_path)
+    result = db.store.connect(args.db_path, read_only=True)
+    if is_not_ok(result):
+        return result
+
+    conn = result[1]
     conn.row_factory = sqlite3.Row
 
     try:
-        result = db.store.init(conn)
-        if is_not_ok(result):
-            conn.close()
-            return result
-
         # Get CIK from piped data or explicit ticker or default ticker
         explicit_ciks = []
 
@@ -157,6 +156,17 @@ def run(cmd: Cmd, args) -> Result[Cmd, str]:
         return err(f"cli.report.run: {e}")
 
 
+# Period labels for YTD and annual modes; other modes use fiscal_period
+_MODE_PERIOD_LABELS = {"threeQ": "9M YTD", "semester": "6M YTD", "year": "FY"}
+
+# Chronological order of pivoted periods: Q1, Q2, 6M YTD, Q3, 9M YTD, Q4, FY
+# (decimals sub-sort quarters before YTD); unknown periods go last
+_PIVOT_PERIOD_ORDER = {"Q1": 1.0, "Q2": 2.0, "6M YTD": 2.1, "Q3": 3.0, "9M YTD": 3.1, "Q4": 4.0, "FY": 5.0}
+
+# Output order once quarters are derived: quarters, then YTD, then Q4 and FY
+_REPORT_PERIOD_ORDER = {"Q1": 1, "Q2": 2, "Q3": 3, "6M YTD": 4, "9M YTD": 5, "Q4": 6, "FY": 7}
+
+
 def _pivot_facts(facts: list[dict[str, Any]]) -> Result[list[dict[str, Any]], str]:
     """
     Pivot facts to wide format: periods × concepts.
@@ -168,69 +178,41 @@ def _pivot_facts(facts: list[dict[str, Any]]) -> Result[list[dict[str, Any]], st
     - threeQ mode -> 9M YTD (9-month year-to-date, NOT Q3 quarter)
     - year mode -> FY
     """
-    # Collect all unique concept names for column consistency
-    all_concepts = set()
+    # Collect concept metadata and group values by (fiscal_year, period_label, mode)
+    # in one pass. Mode distinguishes threeQ from Q3 quarter.
     concept_decimals: dict[str, str] = {}  # Track decimals per concept
     concept_balance: dict[str, str | None] = {}  # Track balance per concept
     concept_tag: dict[str, str] = {}  # Track tag per concept for average detection
+    period_data: dict[tuple[str, str, str], dict[str, Any]] = defaultdict(dict)
 
     for fact in facts:
         concept_name = fact["concept_name"]
-        all_concepts.add(concept_name)
+        mode = fact["mode"]
+
         # Store the first decimals value seen for each concept (should be consistent)
         if concept_name not in concept_decimals and fact.get("decimals"):
             concept_decimals[concept_name] = fact["decimals"]
-        # Store balance attribute (debit/credit/None)
+        # Store balance attribute (debit/credit/None) and tag for average detection
         if concept_name not in concept_balance:
             concept_balance[concept_name] = fact.get("balance")
-        # Store tag for average detection
-        if concept_name not in concept_tag:
             concept_tag[concept_name] = fact.get("tag", "")
 
-    # Group facts by (fiscal_year, fiscal_period, mode) to distinguish threeQ from Q3 quarter
-    period_data: dict[tuple[str, str, str], dict[str, Any]] = defaultdict(dict)
-
-    for fact in facts:
-        fiscal_year = fact["fiscal_year"]
-        fiscal_period = fact["fiscal_period"]
-        mode = fact["mode"]
-        concept_name = fact["concept_name"]
-        value = fact["value"]
-
         # Create period label based on mode, not just fiscal_period
         # This distinguishes between "Q3 quarter" vs "9M YTD" which both have fiscal_period="Q3"
-        if mode == "threeQ":
-            period_label = "9M YTD"
-        elif mode == "semester":
-            period_label = "6M YTD"
-        elif mode == "year":
-            period_label = "FY"
-        elif mode == "quarter":
-            period_label = fiscal_period  # Q1, Q2, Q3
-        elif mode == "instant":
-            period_label = fiscal_period  # Use fiscal_period for balance sheet items
-        else:
-            period_label = fiscal_period  # Fallback
+        # Quarter, instant and unknown modes use fiscal_period (Q1, Q2, Q3, FY)
+        period_label = _MODE_PERIOD_LABELS.get(mode) or fact["fiscal_period"]
+
+        period_key = (fact["fiscal_year"], period_label, mode)
+        period_data[period_key][concept_name] = fact["value"]
 
-        period_key = (fiscal_year, period_label, mode)
-        period_data[period_key][concept_name] = value
+    # Column order is the same for every row
+    all_concepts = sorted(concept_balance)
 
     # Helper: Define chronological period order
     def period_sort_key(item):
         """Sort periods chronologically: Q1, Q2, 6M YTD, Q3, 9M YTD, Q4, FY."""
         fiscal_year, period_label, mode = item[0]
-        # Map period labels to chronological order (use decimals to sub-sort quarters before YTD)
-        order = {
-            "Q1": 1.0,
-            "Q2": 2.0,
-            "6M YTD": 2.1,  # After Q2
-            "Q3": 3.0,
-            "9M YTD": 3.1,  # After Q3
-            "Q4": 4.0,
-            "FY": 5.0,
-        }
-        period_order = order.get(period_label, 99)  # Unknown periods go last
-        return (fiscal_year, period_order, period_label)
+        return (fiscal_year, _PIVOT_PERIOD_ORDER.get(period_label, 99), period_label)
 
     # Convert to list of dicts, ensuring all concepts appear as columns
     pivoted = []
@@ -247,7 +229,7 @@ def _pivot_facts(facts: list[dict[str, Any]]) -> Result[list[dict[str, Any]], st
             "_concept_tag": concept_tag,  # Store tags for average detection
         }
         # Add all concepts as columns, even if missing (will be None)
-        for concept_name in sorted(all_concepts):
+        for concept_name in all_concepts:
             row[concept_name] = concept_values.get(concept_name)
 
         pivoted.append(row)
@@ -310,13 +292,15 @@ def _derive_quarters(pivoted: list[dict[str, Any]], facts: list[dict[str, Any]])
             # If we see instant mode for this concept, it's a stock variable
             concept_modes[concept_name] = "instant"
 
-    # Get all unique concept names to ensure consistent columns
-    all_concepts = set()
+    # Get all unique concept names to ensure consistent columns, in the
+    # same sorted order as the pivoted rows
+    all_concepts_set = set()
     metadata_keys = ("fiscal_year", "fiscal_period", "mode", "_concept_decimals", "_concept_balance", "_concept_tag")
     for row in pivoted:
         for key in row.keys():
             if key not in metadata_keys:
-                all_concepts.add(key)
+                all_concepts_set.add(key)
+    all_concepts = sorted(all_concepts_set)
 
     # Group pivoted data by fiscal year
     year_data: dict[str, dict[str, dict[str, Any]]] = defaultdict(dict)
@@ -337,6 +321,10 @@ def _derive_quarters(pivoted: list[dict[str, Any]], facts: list[dict[str, Any]])
         ytd_6m_row = periods.get("6M YTD", {})
         ytd_9m_row = periods.get("9M YTD", {})
 
+        # Skip years that have nothing to derive before classifying concepts
+        if "Q2" in periods and "Q3" in periods and ("Q4" in periods or not fy_row):
+            continue
+
         # Get metadata for quarter derivation (prefer FY, fallback to any available row)
         metadata_row = fy_row or ytd_9m_row or ytd_6m_row or q1_row
         if not metadata_row:
@@ -344,11 +332,12 @@ def _derive_quarters(pivoted: list[dict[str, Any]], facts: list[dict[str, Any]])
         concept_decimals = metadata_row.get("_concept_decimals", {})
         concept_balance = metadata_row.get("_concept_balance", {})
         concept_tag = metadata_row.get("_concept_tag", {})
+        concept_kinds = _concept_kinds(all_concepts, concept_modes, concept_balance, concept_tag)
 
         # Derive Q2 if missing and 6M YTD exists
         if "Q2" not in periods and ytd_6m_row and q1_row:
             q2_row_derived = _derive_quarter_by_subtraction(
-                fiscal_year, "Q2", all_concepts, concept_modes,
+                fiscal_year, "Q2", all_concepts, concept_kinds,
                 concept_decimals, concept_balance, concept_tag,
                 minuend=ytd_6m_row, subtrahend=q1_row
             )
@@ -361,14 +350,14 @@ def _derive_quarters(pivoted: list[dict[str, Any]], facts: list[dict[str, Any]])
             # Prefer: Q3 = 9M YTD - 6M YTD
             if ytd_6m_row:
                 q3_row_derived = _derive_quarter_by_subtraction(
-                    fiscal_year, "Q3", all_concepts, concept_modes,
+                    fiscal_year, "Q3", all_concepts, concept_kinds,
                     concept_decimals, concept_balance, concept_tag,
                     minuend=ytd_9m_row, subtrahend=ytd_6m_row
                 )
             # Fallback: Q3 = 9M YTD - Q1 - Q2
             elif q1_row and periods.get("Q2"):
                 q3_row_derived = _derive_quarter_by_double_subtraction(
-                    fiscal_year, "Q3", all_concepts, concept_modes,
+                    fiscal_year, "Q3", all_concepts, concept_kinds,
                     concept_decimals, concept_balance, concept_tag,
                     minuend=ytd_9m_row, sub1=q1_row, sub2=periods["Q2"]
                 )
@@ -392,8 +381,7 @@ def _derive_quarters(pivoted: list[dict[str, Any]], facts: list[dict[str, Any]])
             "_concept_balance": concept_balance,
             "_concept_tag": concept_tag,
         }
-        for concept_name in all_concepts:
-            q4_row[concept_name] = None
+        q4_row.update(dict.fromkeys(all_concepts))
 
         # Track if we have any flow variables
         has_flow = False
@@ -405,57 +393,39 @@ def _derive_quarters(pivoted: list[dict[str, Any]], facts: list[dict[str, Any]])
             if fy_value is None:
                 continue  # Can't derive without FY value
 
-            # Check if this is a stock variable (instant mode)
-            is_stock = concept_modes.get(concept_name) == "instant"
-
-            if is_stock:
+            kind = concept_kinds[concept_name]
+            if kind == "stock":
                 # Stock variable (balance sheet): copy FY value
                 q4_row[concept_name] = fy_value
                 has_stock = True
+                continue
+
+            # Flow variable: derive, or copy FY (weighted averages)
+            has_flow = True
+            if kind == "copy":
+                q4_row[concept_name] = fy_value
+                continue
+
+            # Derive Q4 by subtraction
+            derived_value = None
+
+            # Option 1: Use 9M YTD if available (most common case)
+            ytd_9m_val = ytd_9m_row.get(concept_name)
+            if ytd_9m_val is not None:
+                derived_value = fy_value - ytd_9m_val
             else:
-                # Flow variable: determine if derivable or should copy FY
-                has_flow = True
-
-                # Get concept metadata
-                balance = concept_balance.get(concept_name)
-                tag = concept_tag.get(concept_name, "")
-
-                # Derive if:
-                # 1. Has balance attribute (debit/credit) - typical for balance sheet rollforwards
-                # 2. Is EPS metric
-                # 3. Has no balance attribute (typical for cash flow) AND is not an average
-                # Do NOT derive if tag contains "average" (weighted averages are not additive)
-                is_balance_item = balance in ("debit", "credit")
-                is_eps = "earningspershare" in tag.lower()
-                is_flow_without_balance = balance is None
-                is_average = "average" in tag.lower()
-
-                should_derive = (is_balance_item or is_eps or is_flow_without_balance) and not is_average
-
-                if not should_derive:
-                    # Copy FY value (weighted averages)
-                    q4_row[concept_name] = fy_value
-                else:
-                    # Derive Q4 by subtraction
-                    derived_value = None
-
-                    # Option 1: Use 9M YTD if available (most common case)
-                    ytd_9m_val = ytd_9m_row.get(concept_name)
-                    if ytd_9m_val is not None:
-                        derived_value = fy_value - ytd_9m_val
-                    else:
-                        # Option 2: Use Q1 + Q2 + Q3 if all are available
-                        q1_val = q1_row.get(concept_name)
-                        q2_val = q2_row.get(concept_name)
-                        q3_val = q3_row.get(concept_name)
-
-                        if q1_val is not None and q2_val is not None and q3_val is not None:
-                            derived_value = fy_value - (q1_val + q2_val + q3_val)
-                        # Otherwise leave as None (can't derive)
-
-                    # Round derived value to match filed precision
-                    if derived_value is not None:
-                        q4_row[concept_name] = _round_to_decimals(derived_value, concept_decimals.get(concept_name))
+                # Option 2: Use Q1 + Q2 + Q3 if all are available
+                q1_val = q1_row.get(concept_name)
+                q2_val = q2_row.get(concept_name)
+                q3_val = q3_row.get(concept_name)
+
+                if q1_val is not None and q2_val is not None and q3_val is not None:
+                    derived_value = fy_value - (q1_val + q2_val + q3_val)
+                # Otherwise leave as None (can't derive)
+
+            # Round derived value to match filed precision
+            if derived_value is not None:
+                q4_row[concept_name] = _round_to_decimals(derived_value, concept_decimals.get(concept_name))
 
         # Set mode based on what types of concepts we derived
         # If only stock variables (instant), mark as instant
@@ -466,43 +436,77 @@ def _derive_quarters(pivoted: list[dict[str, Any]], facts: list[dict[str, Any]])
         output.append(q4_row)
 
     # Sort output by year and period
-    period_order = {"Q1": 1, "Q2": 2, "Q3": 3, "6M YTD": 4, "9M YTD": 5, "Q4": 6, "FY": 7}
-    output.sort(key=lambda x: (x["fiscal_year"], period_order.get(x["fiscal_period"], 99)))
+    output.sort(key=lambda x: (x["fiscal_year"], _REPORT_PERIOD_ORDER.get(x["fiscal_period"], 99)))
 
     return output
 
 
+def _concept_kinds(
+    all_concepts: list[str], concept_modes: dict,
+    concept_balance: dict, concept_tag: dict
+) -> dict[str, str]:
+    """
+    Classify each concept once for quarter derivation:
+    - "stock": instant (balance sheet) value, copy the snapshot
+    - "copy": flow that is not additive (weighted averages), copy the YTD/FY value
+    - "derive": flow derived by subtraction
+
+    Derive if:
+    1. Has balance attribute (debit/credit) - typical for balance sheet rollforwards
+    2. Is EPS metric
+    3. Has no balance attribute (typical for cash flow) AND is not an average
+    Do NOT derive if tag contains "average" (weighted averages are not additive)
+    """
+    kinds = {}
+    for concept_name in all_concepts:
+        if concept_modes.get(concept_name) == "instant":
+            kinds[concept_name] = "stock"
+            continue
+
+        balance = concept_balance.get(concept_name)
+        tag = concept_tag.get(concept_name, "").lower()
+
+        is_balance_item = balance in ("debit", "credit")
+        is_eps = "earningspershare" in tag
+        is_flow_without_balance = balance is None
+        is_average = "average" in tag
+
+        should_derive = (is_balance_item or is_eps or is_flow_without_balance) and not is_average
+        kinds[concept_name] = "derive" if should_derive else "copy"
+    return kinds
+
+
 def _derive_quarter_by_subtraction(
-    fiscal_year: str, quarter_label: str, all_concepts: set,
-    concept_modes: dict, concept_decimals: dict,
+    fiscal_year: str, quarter_label: str, all_concepts: list[str],
+    concept_kinds: dict, concept_decimals: dict,
     concept_balance: dict, concept_tag: dict,
     minuend: dict, subtrahend: dict
 ) -> dict[str, Any] | None:
     """Helper: Derive quarter = minuend - subtrahend."""
     return _derive_quarter_multi_sub(
-        fiscal_year, quarter_label, all_concepts, concept_modes,
+        fiscal_year, quarter_label, all_concepts, concept_kinds,
         concept_decimals, concept_balance, concept_tag,
         minuend, [subtrahend]
     )
 
 
 def _derive_quarter_by_double_subtraction(
-    fiscal_year: str, quarter_label: str, all_concepts: set,
-    concept_modes: dict, concept_decimals: dict,
+    fiscal_year: str, quarter_label: str, all_concepts: list[str],
+    concept_kinds: dict, concept_decimals: dict,
     concept_balance: dict, concept_tag: dict,
     minuend: dict, sub1: dict, sub2: dict
 ) -> dict[str, Any] | None:
     """Helper: Derive quarter = minuend - sub1 - sub2."""
     return _derive_quarter_multi_sub(
-        fiscal_year, quarter_label, all_concepts, concept_modes,
+        fiscal_year, quarter_label, all_concepts, concept_kinds,
         concept_decimals, concept_balance, concept_tag,
         minuend, [sub1, sub2]
     )
 
 
 def _derive_quarter_multi_sub(
-    fiscal_year: str, quarter_label: str, all_concepts: set,
-    concept_modes: dict, concept_decimals: dict,
+    fiscal_year: str, quarter_label: str, all_concepts: list[str],
+    concept_kinds: dict, concept_decimals: dict,
     concept_balance: dict, concept_tag: dict,
     minuend: dict, subtrahends: list[dict]
 ) -> dict[str, Any] | None:
@@ -525,50 +529,36 @@ def _derive_quarter_multi_sub(
             quarter_row[concept_name] = None
             continue
 
-        is_stock = concept_modes.get(concept_name) == "instant"
-
-        if is_stock:
+        kind = concept_kinds[concept_name]
+        if kind == "stock":
             # Stock variable: copy snapshot
             quarter_row[concept_name] = minuend_value
             has_stock = True
+            continue
+
+        # Flow variable: derive, or copy (weighted averages)
+        has_flow = True
+        if kind == "copy":
+            quarter_row[concept_name] = minuend_value
+            continue
+
+        # Derive by subtraction
+        can_derive = True
+        subtrahend_sum = 0
+        for sub in subtrahends:
+            val = sub.get(concept_name)
+            if val is None:
+                can_derive = False
+                break
+            subtrahend_sum += val
+
+        if can_derive:
+            derived = minuend_value - subtrahend_sum
+            quarter_row[concept_name] = _round_to_decimals(
+                derived, concept_decimals.get(concept_name)
+            )
         else:
-            # Flow variable: decide if derivable
-            has_flow = True
-            balance = concept_balance.get(concept_name)
-            tag = concept_tag.get(concept_name, "")
-
-            # Derive if:
-            # 1. Has balance attribute (debit/credit) - typical for balance sheet rollforwards
-            # 2. Is EPS metric
-            # 3. Has no balance attribute (typical for cash flow) AND is not an average
-            # Do NOT derive if tag contains "average" (weighted averages are not additive)
-            is_balance_item = balance in ("debit", "credit")
-            is_eps = "earningspershare" in tag.lower()
-            is_flow_without_balance = balance is None
-            is_average = "average" in tag.lower()
-
-            should_derive = (is_balance_item or is_eps or is_flow_without_balance) and not is_average
-
-            if not should_derive:
-                quarter_row[concept_name] = minuend_value
-            else:
-                # Derive by subtraction
-                can_derive = True
-                subtrahend_sum = 0
-                for sub in subtrahends:
-                    val = sub.get(concept_name)
-                    if val is None:
-                        can_derive = False
-                        break
-                    subtrahend_sum += val
-
-                if can_derive:
-                    derived = minuend_value - subtrahend_sum
-                    quarter_row[concept_name] = _round_to_decimals(
-                        derived, concept_decimals.get(concept_name)
-                    )
-                else:
-                    quarter_row[concept_name] = None
+            quarter_row[concept_name] = None
 
     if has_stock and not has_flow:
         quarter_row["mode"] = "instant"
@@ -704,6 +694,10 @@ def _apply_scale(pivoted: list[dict[str, Any]], scale_choice: str) -> list[dict[
     # Metadata columns that should not be processed
     metadata_cols = {"fiscal_year", "fiscal_period", "mode", "_concept_decimals", "_concept_balance", "_concept_tag"}
 
+    # Column headers depend only on the concept and its decimals, so the
+    # decimals string is parsed once per concept rather than once per cell
+    column_names: dict[tuple[str, str | None], str] = {}
+
     # Build formatted output
     formatted = []
     for row in pivoted:
@@ -722,13 +716,14 @@ def _apply_scale(pivoted: list[dict[str, Any]], scale_choice: str) -> list[dict[
 
             # Determine scale for this concept from XBRL decimals
             decimals = concept_decimals.get(key)
-            scale_suffix = _get_scale_suffix_from_decimals(decimals, scale_choice)
+            column_name = column_names.get((key, decimals))
+            if column_name is None:
+                # Add column with scale suffix in header
+                scale_suffix = _get_scale_suffix_from_decimals(decimals, scale_choice)
+                column_name = column_names[key, decimals] = f"{key} ({scale_suffix})" if scale_suffix else key
 
             # Scale the value for display
             scaled_value = _scale_value_for_display(value, decimals) if value is not None else value
-
-            # Add column with scale suffix in header
-            column_name = f"{key} ({scale_suffix})" if scale_suffix else key
             formatted_row[column_name] = scaled_value
 
         formatted.append(formatted_row)
@@ -123,14 +123,13 @@ def run(cmd: Cmd, args) -> Result[Cmd | None, str]:
     """Route to appropriate select subcommand with input data from main."""
 
     try:
-        conn = sqlite3.connect(args.db_path)
-
-        # Initialize database if needed
-        result = db.store.init(conn)
+        # Read-only: select never writes, so skip init and the write lock
+        result = db.store.connect(args.db_path, read_only=True)
         if is_not_ok(result):
-            conn.close()
             return result
-        
+
+        conn = result[1]
+
         # Route to subcommand handler
         if args.select_cmd == 'entities':
             result = select_entities(conn, cmd, args)
@@ -286,12 +285,11 @@ def _get_access_nos_from_ticker(conn: sqlite3.Connection, ticker: str) -> Result
     cik = entity["cik"]
     
     # Get all filings for this CIK
-    result = db.queries.filings.select_by_entity(conn, ciks=[cik])
+    result = db.queries.filings.select_by_entity_iter(conn, ciks=[cik])
     if is_not_ok(result):
         return result
     
-    filings = result[1]
-    access_nos = [filing["access_no"] for filing in filings]
+    access_nos = [filing["access_no"] for filing in result[1]]
     
     return ok(access_nos)
 
@@ -696,15 +694,17 @@ def select_concepts(conn: sqlite3.Connection, cmd: Cmd, args) -> Result[Cmd, str
         
         missing_pairs = universe_pairs - matched_pairs
         
+        # Filing info for context, one query for all missing pairs
+        result = db.queries.filings.get_many_with_entity(conn, list({access_no for access_no, _ in missing_pairs}))
+        filings_info = result[1] if is_ok(result) else {}
+
         # Convert missing pairs back to role records
         missing_roles = []
         for access_no, role_name in missing_pairs:
-            # Get filing info for context
-            result = db.queries.filings.get_with_entity(conn, access_no)
-            if is_not_ok(result) or not result[1]:
+            filing_info = filings_info.get(access_no)
+            if not filing_info:
                 continue
                 
-            filing_info = result[1]
             missing_roles.append({
                 "name": filing_info["name"],
                 "ticker": filing_info["ticker"],
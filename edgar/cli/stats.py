@@ -44,15 +44,14 @@ def run_concepts(cmd: Cmd, args) -> Result[Cmd, str]:
 
     Can be used with direct arguments or piped role data.
     """
-    conn = sqlite3.connect(args.db_path)
+    result = db.store.connect(args.db_path, read_only=True)
+    if is_not_ok(result):
+        return result
+
+    conn = result[1]
     conn.row_factory = sqlite3.Row
 
     try:
-        result = db.store.init(conn)
-        if is_not_ok(result):
-            conn.close()
-            return result
-
         # Get CIK from ticker
         # Priority 1: Explicit ticker from command line
         # Priority 2: Default ticker from ft.toml
@@ -116,18 +115,16 @@ def run_concepts(cmd: Cmd, args) -> Result[Cmd, str]:
                 return err("--ticker required when using --pattern")
 
             # First, get all filings for this CIK
-            result = db.queries.filings.select_by_entity(conn, ciks=[cik])
+            result = db.queries.filings.select_by_entity_iter(conn, ciks=[cik])
             if is_not_ok(result):
                 conn.close()
                 return result
 
-            filings = result[1]
-            if not filings:
+            access_nos = [f["access_no"] for f in result[1]]
+            if not access_nos:
                 conn.close()
                 return err(f"no filings found for ticker '{ticker}'")
 
-            access_nos = [f["access_no"] for f in filings]
-
             # Get all roles matching pattern
             result = db.queries.roles.select_with_entity(
                 conn,
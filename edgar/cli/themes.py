@@ -367,7 +367,7 @@ def get_default_theme() -> str:
     # Try to load from config file
     try:
         from edgar import config
-        cfg = config.load_config()
+        _, cfg = config.load_toml()
         return config.get_theme(cfg)
     except Exception:
         # Fallback if config system not available
@@ -1,4 +1,3 @@
-import re
 import sys
 import sqlite3
 from typing import Any, Iterable
@@ -21,7 +20,10 @@ def add_arguments(subparsers):
 
 
 def run(cmd: Cmd, args) -> Result[None, str]:
-    conn = sqlite3.connect(args.db_path)
+    result = db.store.connect(args.db_path)
+    if is_not_ok(result):
+        return result
+    conn = result[1]
     conn.row_factory = sqlite3.Row
     try:
         result = db.store.init(conn)
@@ -107,6 +109,7 @@ def run(cmd: Cmd, args) -> Result[None, str]:
                     # Print error row
                     print(f"{ticker:<6}  {cik}  {access_no}  {filing_date}  ERROR: {result[1]}", file=sys.stderr)
 
+        db.store.optimize(conn)
         conn.close()
         return ok(None)
     except Exception as e:
@@ -130,7 +133,8 @@ def _update_filing(conn: sqlite3.Connection, cik: str, access_no: str, role_map:
 
     Returns dict with stats: {fiscal_period, candidates, chosen, inserted}
     """
-    # Load model if not provided (backwards compatibility)
+    # Load model if not provided (backwards compatibility). This happens
+    # before the transaction so the write lock is not held over the fetch.
     if model is None:
         # Get XBRL URL from database (should be cached by probe filings)
         result = db.queries.filings.get_xbrl_url(conn, access_no)
@@ -148,14 +152,31 @@ def _update_filing(conn: sqlite3.Connection, cik: str, access_no: str, role_map:
 
         model = result[1]
 
+    # DEI, new concepts and facts are written as one transaction:
+    # facts.insert() joins it, and any error rolls back the DEI and
+    # concept rows with it.
+    with db.store.transaction(conn):
+        result = _write_filing(conn, cik, access_no, role_map, model, dei)
+        if is_not_ok(result):
+            conn.rollback()
+    return result
+
+
+def _write_filing(conn: sqlite3.Connection, cik: str, access_no: str, role_map: dict[str, list[str]],
+                  model: Any, dei: dict[str, Any] | None) -> Result[dict[str, Any], str]:
+    """
+    Body of _update_filing(), run inside its transaction. Nothing is
+    committed here.
+    """
     # Extract DEI if not provided
     if dei is None:
         dei = xbrl.arelle.extract_dei(model, access_no)
 
-        # Update DEI in database
-        result = db.queries.filings.insert_dei(conn, dei)
-        if is_not_ok(result):
-            return err(f"Error inserting DEI: {result[1]}")
+    # Update DEI in database, even when passed in, so it is committed with
+    # the facts (the UPSERT makes repeated writes for a filing harmless)
+    result = db.queries.filings.insert_dei(conn, dei, commit=False)
+    if is_not_ok(result):
+        return err(f"Error inserting DEI: {result[1]}")
 
     fiscal_period = dei.get("fiscal_period", "?")
     fiscal_year = dei.get("fiscal_year")
@@ -163,13 +184,14 @@ def _update_filing(conn: sqlite3.Connection, cik: str, access_no: str, role_map:
         return err("missing DEI fiscal_period/year")
 
     all_candidates: list[dict[str, Any]] = []
+    concept_ids: dict[tuple[str, str], int] = {}
     for group_name, role_tails in role_map.items():
         for role_tail in role_tails:
             facts = xbrl.arelle.extract_facts_by_role(model, role_tail)
             if not facts:
                 continue
             consolidated_facts = [f for f in facts if xbrl.facts.is_consolidated(f)]
-            records = _facts_to_records(conn, cik, consolidated_facts, access_no, role_tail)
+            records = _facts_to_records(conn, cik, consolidated_facts, access_no, role_tail, concept_ids)
             all_candidates.extend(records)
 
     if not all_candidates:
@@ -206,52 +228,32 @@ def _get_concept_name_from_patterns(conn: sqlite3.Connection, cik: str, tag: str
 
     patterns = result[1]
 
-    # Match tag against each pattern
+    # Match tag against each pattern (invalid patterns are skipped)
     for pattern_row in patterns:
-        try:
-            regex = re.compile(pattern_row["pattern"])
-            if regex.search(tag):
-                return pattern_row["name"]
-        except re.error:
-            continue  # Skip invalid patterns
+        regex = db.regex.compile(pattern_row["pattern"])
+        if regex is not None and regex.search(tag):
+            return pattern_row["name"]
 
     return None
 
 
-def _facts_to_records(conn: sqlite3.Connection, cik: str, facts: Iterable[Any], access_no: str, role_tail: str) -> list[dict[str, Any]]:
+def _facts_to_records(conn: sqlite3.Connection, cik: str, facts: Iterable[Any], access_no: str, role_tail: str, concept_ids: dict[tuple[str, str], int] | None = None) -> list[dict[str, Any]]:
+    # A concept repeats across its contexts and across roles, so its ID is
+    # looked up once and kept in concept_ids, which callers may share
+    if concept_ids is None:
+        concept_ids = {}
+
     out: list[dict[str, Any]] = []
 
     for f in facts:
         taxonomy, tag = xbrl.facts.get_concept(f)
 
-        # Lookup concept ID
-        result = db.queries.concepts.get_id(conn, cik, taxonomy, tag)
-        if is_not_ok(result):
-            continue  # Skip this fact
-
-        concept_id = result[1]
+        concept_id = concept_ids.get((taxonomy, tag))
         if concept_id is None:
-            # Insert new concept - use pattern name if available, otherwise fallback to tag
-            name = _get_concept_name_from_patterns(conn, cik, tag)
-            if name is None:
-                # Fallback to filing label or tag
-                name = getattr(getattr(f, "concept", None), "label", lambda: tag)()
-            # Extract balance attribute for Q4 derivation logic
-            balance = getattr(getattr(f, "concept", None), "balance", None)
-            concept_data = [{
-                "cik": cik,
-                "taxonomy": taxonomy,
-                "tag": tag,
-                "name": name,
-                "balance": balance
-            }]
-            result = db.store.insert_or_ignore(conn, "concepts", concept_data)
-            if is_not_ok(result):
+            concept_id = _resolve_concept_id(conn, cik, f, taxonomy, tag)
+            if concept_id is None:
                 continue  # Skip this fact
-            result = db.queries.concepts.get_id(conn, cik, taxonomy, tag)
-            if is_not_ok(result):
-                continue
-            concept_id = result[1]
+            concept_ids[(taxonomy, tag)] = concept_id
 
         rec = xbrl.facts.make_record(f, access_no, role_tail, concept_id)
         if rec and rec.get("value") is not None:
@@ -259,6 +261,41 @@ def _facts_to_records(conn: sqlite3.Connection, cik: str, facts: Iterable[Any],
     return out
 
 
+def _resolve_concept_id(conn: sqlite3.Connection, cik: str, f: Any, taxonomy: str, tag: str) -> int | None:
+    """Return the concept ID for a fact, inserting the concept if new; None on error."""
+
+    # Lookup concept ID
+    result = db.queries.concepts.get_id(conn, cik, taxonomy, tag)
+    if is_not_ok(result):
+        return None
+
+    concept_id = result[1]
+    if concept_id is None:
+        # Insert new concept - use pattern name if available, otherwise fallback to tag
+        name = _get_concept_name_from_patterns(conn, cik, tag)
+        if name is None:
+            # Fallback to filing label or tag
+            name = getattr(getattr(f, "concept", None), "label", lambda: tag)()
+        # Extract balance attribute for Q4 derivation logic
+        balance = getattr(getattr(f, "concept", None), "balance", None)
+        concept_data = [{
+            "cik": cik,
+            "taxonomy": taxonomy,
+            "tag": tag,
+            "name": name,
+            "balance": balance
+        }]
+        result = db.store.insert_or_ignore(conn, "concepts", concept_data, commit=False)
+        if is_not_ok(result):
+            return None
+        result = db.queries.concepts.get_id(conn, cik, taxonomy, tag)
+        if is_not_ok(result):
+            return None
+        concept_id = result[1]
+
+    return concept_id
+
+
 def _choose_best_per_group(conn: sqlite3.Connection, cik: str, fiscal_year: str, fiscal_period: str, records: list[dict[str, Any]], doc_period_end: str | None = None) -> list[dict[str, Any]]:
     fact_groups: dict[tuple[int, bool, tuple[tuple[str, str], ...]], list[dict[str, Any]]] = defaultdict(list)
 
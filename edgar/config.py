@@ -11,6 +11,7 @@ import os
 import re
 import sys
 import tomllib
+from functools import lru_cache
 from typing import Any, Dict, List, Tuple
 from pathlib import Path
 
@@ -85,8 +86,7 @@ Or create one manually. See https://github.com/emifrn/edgar-pipes for more infor
 
     # Load the TOML file
     try:
-        with open(config_path, "rb") as f:
-            cfg = tomllib.load(f)
+        cfg = _read_toml(config_path, config_path.stat().st_mtime_ns)
     except Exception as e:
         raise RuntimeError(f"Error loading {config_path}: {e}")
 
@@ -105,6 +105,17 @@ Or create one manually. See https://github.com/emifrn/edgar-pipes for more infor
     return root, cfg
 
 
+@lru_cache(maxsize=4)
+def _read_toml(config_path: Path, mtime_ns: int) -> dict[str, Any]:
+    """
+    Parse ep.toml. Cached per path and modification time, so loading the
+    same workspace again in one process (e.g. for the table theme) reuses
+    the parsed file, while an edited file is read afresh.
+    """
+    with open(config_path, "rb") as f:
+        return tomllib.load(f)
+
+
 def get_db_path(root: Path, cfg: dict[str, Any]) -> Path:
     """
     Get database file path from ep.toml configuration.
@@ -1,4 +1,5 @@
 # This directory is a Python package
 # Import all submodules for easy access
+from . import regex
 from . import store
 from . import queries
@@ -71,18 +71,19 @@ def get_by_name(conn: sqlite3.Connection, cik: str, name: str) -> Result[Optiona
         return result
 
 
-def insert(conn: sqlite3.Connection, cik: str, name: str, pattern: str, uid: Optional[int] = None, note: Optional[str] = None) -> Result[int, str]:
+def insert(conn: sqlite3.Connection, cik: str, name: str, pattern: str, uid: Optional[int] = None, note: Optional[str] = None, commit: bool = True) -> Result[int, str]:
     """
     Insert concept pattern with UID (without OR IGNORE).
 
     Raises error if pattern already exists.
-    Returns pattern ID.
+    Returns pattern ID. Pass commit=False when called inside a transaction.
     """
     try:
         query = "INSERT INTO concept_patterns (cik, name, pattern, uid, note) VALUES (?, ?, ?, ?, ?)"
         cursor = conn.execute(query, (cik, name, pattern, uid, note))
         pid = cursor.lastrowid
-        conn.commit()
+        if commit:
+            conn.commit()
         cursor.close()
         return ok(pid)
     except sqlite3.IntegrityError as e:
@@ -130,7 +131,9 @@ def select(conn: sqlite3.Connection, group_name: Optional[str] = None, cik: Opti
 
     Returns patterns with empty group_name for unlinked patterns.
     """
-    base_query = """
+    # One statement text for every filter combination: a NULL parameter
+    # disables its filter.
+    query = """
         SELECT cp.pid,
                cp.cik,
                cp.name,
@@ -141,65 +144,46 @@ def select(conn: sqlite3.Connection, group_name: Optional[str] = None, cik: Opti
         FROM concept_patterns cp
         LEFT JOIN group_concept_patterns gcp ON cp.pid = gcp.pid
         LEFT JOIN groups g ON gcp.gid = g.gid
+        WHERE (? IS NULL OR g.name = ?)
+        AND (? IS NULL OR cp.cik = ?)
+        GROUP BY cp.pid, cp.cik, cp.name, cp.pattern, cp.uid, cp.note
         """
 
-    where_clauses = []
-    params = []
-
-    if group_name:
-        where_clauses.append("g.name = ?")
-        params.append(group_name)
-
-    if cik:
-        where_clauses.append("cp.cik = ?")
-        params.append(cik)
-
-    if where_clauses:
-        query = base_query + " WHERE " + " AND ".join(where_clauses)
-    else:
-        query = base_query
-
-    query += " GROUP BY cp.pid, cp.cik, cp.name, cp.pattern, cp.uid, cp.note"
+    group_name = group_name or None
+    cik = cik or None
+    params = (group_name, group_name, cik, cik)
 
-    return db.store.select(conn, query, tuple(params))
+    return db.store.select(conn, query, params)
 
 
-def update(conn: sqlite3.Connection, pid: int, pattern: Optional[str] = None, name: Optional[str] = None, uid: Optional[int] = None, note: Optional[str] = None) -> Result[int, str]:
+def update(conn: sqlite3.Connection, pid: int, pattern: Optional[str] = None, name: Optional[str] = None, uid: Optional[int] = None, note: Optional[str] = None, commit: bool = True) -> Result[int, str]:
     """
     Update concept pattern.
 
     Only updates fields that are provided (not None).
-    Returns number of rows updated.
+    Returns number of rows updated. Pass commit=False when called inside
+    a transaction.
     """
-    updates = []
-    params = []
-
-    if pattern is not None:
-        updates.append("pattern = ?")
-        params.append(pattern)
-
-    if name is not None:
-        updates.append("name = ?")
-        params.append(name)
-
-    if uid is not None:
-        updates.append("uid = ?")
-        params.append(uid)
-
-    if note is not None:
-        updates.append("note = ?")
-        params.append(note)
-
-    if not updates:
+    if all(value is None for value in (pattern, name, uid, note)):
         return ok(0)  # Nothing to update
 
-    params.append(pid)
-    query = f"UPDATE concept_patterns SET {', '.join(updates)} WHERE pid = ?"
+    # Fixed statement text: COALESCE keeps the current value for any
+    # field passed as None.
+    query = """
+        UPDATE concept_patterns SET
+            pattern = COALESCE(?, pattern),
+            name = COALESCE(?, name),
+            uid = COALESCE(?, uid),
+            note = COALESCE(?, note)
+        WHERE pid = ?
+    """
+    params = (pattern, name, uid, note, pid)
 
     try:
-        cursor = conn.execute(query, tuple(params))
+        cursor = conn.execute(query, params)
         count = cursor.rowcount
-        conn.commit()
+        if commit:
+            conn.commit()
         cursor.close()
         return ok(count)
     except sqlite3.Error as e:
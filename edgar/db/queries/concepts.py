@@ -1,4 +1,4 @@
-import re
+import json
 import sqlite3
 from typing import Any, Optional
 
@@ -11,12 +11,7 @@ def get_id(conn: sqlite3.Connection, cik: str, taxonomy: str, tag: str) -> Resul
     Get cid for a specific concept by unique key.
     """
     query = "SELECT cid FROM concepts WHERE cik = ? AND taxonomy = ? AND tag = ?"
-    result = db.store.select(conn, query, (cik, taxonomy, tag))
-    if is_ok(result):
-        concepts = result[1]
-        return ok(concepts[0]["cid"] if concepts else None)
-    else:
-        return result
+    return db.store.select_scalar(conn, query, (cik, taxonomy, tag))
 
 
 def select_by_entity(conn: sqlite3.Connection, cik: str, taxonomy: Optional[str] = None) -> Result[list[dict[str, Any]], str]:
@@ -64,20 +59,17 @@ def select_by_pattern(conn: sqlite3.Connection, gid: int, cik: str, concept_name
         search_field: Field to search - "tag" or "name" (label)
     """
 
-    # Get concept patterns to apply
-    if concept_name:
-        # Get specific pattern
-        query = """
-            SELECT cp.pid, cp.name, cp.pattern
-            FROM concept_patterns cp
-            JOIN group_concept_patterns gcp ON cp.pid = gcp.pid
-            WHERE gcp.gid = ? AND cp.cik = ? AND cp.name = ?
-            """
-        result = db.store.select(conn, query, (gid, cik, concept_name))
-    else:
-        # Get all patterns for this group/company
-        result = db.queries.concept_patterns.select_by_group(conn, gid, cik)
+    # Patterns to apply: one named pattern, or all of the group's patterns
+    pattern_filter = """
+        SELECT cp.pid, cp.name, cp.pattern
+        FROM concept_patterns cp
+        JOIN group_concept_patterns gcp ON cp.pid = gcp.pid
+        WHERE gcp.gid = ? AND cp.cik = ? AND (? IS NULL OR cp.name = ?)
+        """
+    concept_name = concept_name or None
+    pattern_params = (gid, cik, concept_name, concept_name)
 
+    result = db.store.select(conn, pattern_filter, pattern_params)
     if is_not_ok(result):
         return result
 
@@ -85,57 +77,45 @@ def select_by_pattern(conn: sqlite3.Connection, gid: int, cik: str, concept_name
     if not patterns:
         return ok([])  # No patterns defined
 
-    # Get available concepts from roles that match this group's role patterns
-    # This limits the search to concepts from relevant roles only
-    query = """
-        SELECT DISTINCT c.cid, c.cik, c.taxonomy, c.tag, c.name as label
-        FROM concepts c
-        JOIN role_concepts frc ON c.cid = frc.cid
-        JOIN roles fr ON frc.rid = fr.rid
-        JOIN filings f ON fr.access_no = f.access_no
-        WHERE f.cik = ?
-        AND EXISTS (
-            SELECT 1 FROM group_role_patterns grp
-            JOIN role_patterns rp ON grp.pid = rp.pid
-            WHERE grp.gid = ? AND rp.cik = ?
-        )
-        ORDER BY c.taxonomy, c.tag
-        """
-
-    result = db.store.select(conn, query, (cik, gid, cik))
-    if is_not_ok(result):
-        return result
-
-    available_concepts = result[1]
-    if not available_concepts:
-        return ok([])
-
-    # Apply each pattern dynamically
-    matches = []
-
+    # REGEXP treats an invalid pattern as matching nothing; report it instead
     for pattern_record in patterns:
         pattern_text = pattern_record["pattern"]
-        pattern_name = pattern_record["name"]
+        if db.regex.compile(pattern_text) is None:
+            return err(f"concepts.select_by_pattern: invalid regex '{pattern_text}': {db.regex.error(pattern_text)}")
 
-        try:
-            regex = re.compile(pattern_text)
-        except re.error as e:
-            return err(f"concepts.select_by_pattern: invalid regex '{pattern_text}': {e}")
-
-        # Apply pattern to available concepts
-        for concept in available_concepts:
-            if search_field == "tag":
-                field_value = concept["tag"]
-            else:
-                field_value = concept["label"]
-            if regex.search(field_value):
-                # Add pattern context to the match
-                match = dict(concept)
-                match["concept_name"] = pattern_name
-                match["pattern"] = pattern_text
-                matches.append(match)
+    # Apply every pattern to the available concepts in one statement. The
+    # candidates are limited to concepts from filings of this company, and
+    # only when the group has role patterns for it.
+    field = "tag" if search_field == "tag" else "label"
+    query = f"""
+        WITH pats AS ({pattern_filter}),
+        cands AS (
+            SELECT DISTINCT c.cid, c.cik, c.taxonomy, c.tag, c.name as label
+            FROM concepts c
+            JOIN role_concepts frc ON c.cid = frc.cid
+            JOIN roles fr ON frc.rid = fr.rid
+            JOIN filings f ON fr.access_no = f.access_no
+            WHERE f.cik = ?
+            AND EXISTS (
+                SELECT 1 FROM group_role_patterns grp
+                JOIN role_patterns rp ON grp.pid = rp.pid
+                WHERE grp.gid = ? AND rp.cik = ?
+            )
+        )
+        SELECT cands.cid,
+               cands.cik,
+               cands.taxonomy,
+               cands.tag,
+               cands.label,
+               pats.name AS concept_name,
+               pats.pattern
+        FROM pats
+        CROSS JOIN cands
+        WHERE cands.{field} REGEXP pats.pattern
+        ORDER BY pats.pid, cands.taxonomy, cands.tag
+        """
 
-    return ok(matches)
+    return db.store.select(conn, query, pattern_params + (cik, gid, cik))
 
 
 def frequency(
@@ -166,67 +146,60 @@ def frequency(
     if not role_filter:
         return err("concepts.frequency: role_filter cannot be empty")
 
-    # Get total number of filings with these roles
-    placeholders = ",".join("?" * len(role_filter))
-    query_total = f"""
-        SELECT COUNT(DISTINCT f.access_no) as total
-        FROM filings f
-        JOIN roles fr ON f.access_no = fr.access_no
-        WHERE f.cik = ? AND fr.name IN ({placeholders})
-    """
-    params_total = [cik] + role_filter
-
-    result = db.store.select(conn, query_total, tuple(params_total))
-    if is_not_ok(result):
-        return result
+    # sort_by is validated against this whitelist before it reaches the SQL.
+    # Ties fall back to tag, name, the order the rows are grouped in.
+    order_by = {
+        "count": "filing_count DESC, c.tag, c.name",
+        "tag": "c.tag, c.name",
+        "first": "first_date, c.tag, c.name",
+        "last": "last_date, c.tag, c.name"
+    }.get(sort_by)
+    if order_by is None:
+        return err(f"concepts.frequency: invalid sort_by '{sort_by}'")
 
-    total_filings = result[1][0]["total"] if result[1] else 0
-    if total_filings == 0:
-        return ok([])
+    # Role names are bound as one JSON array so the statement text is the
+    # same for any number of roles and stays in the statement cache.
+    role_names = json.dumps(role_filter)
 
-    # Get concept frequency
+    # Concept frequency, with the total number of filings having these
+    # roles fetched in the same statement. The total is a CTE rather than
+    # COUNT(DISTINCT ...) OVER (), which SQLite window functions do not
+    # support. The percentage is rounded in Python: SQLite's ROUND() takes
+    # .x5 ties away from zero and would change the reported figures.
     query = f"""
+        WITH total AS (
+            SELECT COUNT(DISTINCT f.access_no) as filings
+            FROM filings f
+            JOIN roles fr ON f.access_no = fr.access_no
+            WHERE f.cik = ? AND fr.name IN (SELECT value FROM json_each(?))
+        )
         SELECT
             c.tag,
             c.name,
             COUNT(DISTINCT f.access_no) as filing_count,
             MIN(f.filing_date) as first_date,
-            MAX(f.filing_date) as last_date
+            MAX(f.filing_date) as last_date,
+            (SELECT filings FROM total) as total_filings
         FROM concepts c
         JOIN facts fa ON c.cid = fa.cid
         JOIN roles fr ON fa.rid = fr.rid
         JOIN filings f ON fr.access_no = f.access_no
         WHERE f.cik = ?
-        AND fr.name IN ({placeholders})
+        AND fr.name IN (SELECT value FROM json_each(?))
         GROUP BY c.tag, c.name
         HAVING filing_count >= ?
+        ORDER BY {order_by}
     """
 
     # Build params
-    params = [cik] + role_filter + [min_count]
+    params = (cik, role_names, cik, role_names, min_count)
 
-    result = db.store.select(conn, query, tuple(params))
+    result = db.store.select(conn, query, params)
     if is_not_ok(result):
         return result
 
     stats = result[1]
-
-    # Add percentage calculation
     for stat in stats:
-        stat["percentage"] = round((stat["filing_count"] / total_filings) * 100, 1)
-
-    # Sort results
-    sort_key_map = {
-        "count": lambda x: (-x["filing_count"], x["tag"]),  # Descending count, then tag
-        "tag": lambda x: x["tag"],
-        "first": lambda x: x["first_date"],
-        "last": lambda x: x["last_date"]
-    }
-
-    sort_key = sort_key_map.get(sort_by)
-    if not sort_key:
-        return err(f"concepts.frequency: invalid sort_by '{sort_by}'")
-
-    stats.sort(key=sort_key)
+        stat["percentage"] = round((stat["filing_count"] / stat.pop("total_filings")) * 100, 1)
 
     return ok(stats)
@@ -1,3 +1,4 @@
+import json
 import sqlite3
 from typing import Any, Optional
 
@@ -36,8 +37,7 @@ def select(conn: sqlite3.Connection, tickers: Optional[list[str]] = None) -> Res
     Get all entities, optionally filtered by ticker list.
     """
     if tickers:
-        placeholders = ",".join("?" for _ in tickers)
-        query = f"SELECT cik, ticker, name FROM entities WHERE ticker IN ({placeholders}) ORDER BY ticker"
-        return db.store.select(conn, query, tuple(t.lower() for t in tickers))
+        query = "SELECT cik, ticker, name FROM entities WHERE ticker IN (SELECT value FROM json_each(?)) ORDER BY ticker"
+        return db.store.select(conn, query, (json.dumps([t.lower() for t in tickers]),))
     else:
         return db.store.select(conn, "SELECT cik, ticker, name FROM entities ORDER BY ticker")
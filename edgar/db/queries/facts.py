@@ -5,57 +5,70 @@ Facts are the core financial data extracted from XBRL filings.
 Each fact represents a specific value for a concept in a particular context.
 """
 import re
+import json
 import sqlite3
-from typing import Any, Optional
+from functools import lru_cache
+from typing import Any, Iterator, Optional
 
 from edgar import db
 from edgar.result import Result, ok, err, is_ok, is_not_ok
 
 
-def _insert_context(conn: sqlite3.Connection, start_date: str, end_date: str, mode: str) -> Result[int, str]:
-    """
-    Insert context if missing and return xid (idempotent).
+# Fields a fact record must carry to be inserted
+_REQUIRED_FIELDS = ("access_no", "role", "cid", "value", "start_date", "end_date", "mode", "unit")
 
-    A context represents a time period for a fact (instant, quarter, year, etc).
+# select_group date filter clauses by (field, operator)
+_DATE_FILTER_SQL = {
+    (field, operator): f" AND ctx.{field} {operator} ?"
+    for field in ("start_date", "end_date")
+    for operator in ("<", "<=", "=", ">=", ">", "<>", "!=")
+}
+
+# Literal run at the start of a '^'-anchored pattern
+_ANCHORED_PREFIX = re.compile(r"\^([A-Za-z0-9_]+)")
+
+
+def _glob_hint(pattern: str) -> Optional[str]:
     """
-    context_data = [{"start_date": start_date, "end_date": end_date, "mode": mode}]
-    result = db.store.insert_or_ignore(conn, "contexts", context_data)
-    if is_not_ok(result):
-        return result
+    Return a GLOB that every tag matching the pattern also matches, or None.
 
-    query = "SELECT xid FROM contexts WHERE start_date = ? AND end_date = ? AND mode = ?"
-    result = db.store.select(conn, query, (start_date, end_date, mode))
-    if is_not_ok(result):
-        return result
+    Only '^'-anchored patterns without alternation have one: '^Revenue.*'
+    gives 'Revenue*'. A literal followed by an optional quantifier loses
+    its last character ('^Revenues?' gives 'Revenue*').
+    """
+    if "|" in pattern:
+        return None
+    match = _ANCHORED_PREFIX.match(pattern)
+    if match is None:
+        return None
+    prefix = match.group(1)
+    if pattern[match.end():match.end() + 1] in ("?", "*", "{"):
+        prefix = prefix[:-1]
+    return prefix + "*" if prefix else None
+
+
+def _insert_contexts(conn: sqlite3.Connection, keys: list[tuple[str, str, str]]) -> Result[dict[tuple[str, str, str], int], str]:
+    """
+    Insert missing contexts and return {(start_date, end_date, mode): xid}.
 
-    contexts = result[1]
-    if contexts:
-        return ok(contexts[0]["xid"])
-    else:
-        return err(f"_insert_context({start_date}, {end_date}, {mode}): context not found after insert")
+    A context represents a time period for a fact (instant, quarter, year, etc).
+    Contexts that fail a table constraint are ignored and absent from the map.
+    """
+    context_data = [{"start_date": start, "end_date": end, "mode": mode} for start, end, mode in keys]
+    return db.store.insert_returning(conn, "contexts", context_data, ["start_date", "end_date", "mode"], "xid", commit=False)
 
 
-def _insert_unit(conn: sqlite3.Connection, unit_name: str) -> Result[int, str]:
+def _insert_units(conn: sqlite3.Connection, names: list[str]) -> Result[dict[str, int], str]:
     """
-    Insert unit if missing and return unid (idempotent).
+    Insert missing units and return {name: unid}.
 
     A unit represents the measurement unit for a fact (USD, shares, etc).
     """
-    unit_data = [{"name": unit_name}]
-    result = db.store.insert_or_ignore(conn, "units", unit_data)
-    if is_not_ok(result):
-        return result
-
-    query = "SELECT unid FROM units WHERE name = ?"
-    result = db.store.select(conn, query, (unit_name,))
+    unit_data = [{"name": name} for name in names]
+    result = db.store.insert_returning(conn, "units", unit_data, ["name"], "unid", commit=False)
     if is_not_ok(result):
         return result
-
-    units = result[1]
-    if units:
-        return ok(units[0]["unid"])
-    else:
-        return err(f"_insert_unit({unit_name}): unit not found after insert")
+    return ok({name: unid for (name,), unid in result[1].items()})
 
 
 def select_past_modes(conn: sqlite3.Connection, cik: str, fiscal_year: str, cid: int, dimensions: dict[str, str]) -> Result[list[dict[str, Any]], str]:
@@ -68,21 +81,17 @@ def select_past_modes(conn: sqlite3.Connection, cik: str, fiscal_year: str, cid:
     (e.g., us-gaap/2023 vs us-gaap/2024).
 
     This finds facts matching: cik, fiscal_year, concept_tag
+    The tag is resolved from the CID by an uncorrelated subquery, which
+    SQLite evaluates once per statement. An unknown CID matches nothing.
     If dimensions provided, match those too.
     Join with contexts to get mode, join with dei to get fiscal_period.
     """
-    # First, get the tag for this CID
-    query_tag = "SELECT tag FROM concepts WHERE cid = ?"
-    result = db.store.select(conn, query_tag, (cid,))
-    if is_not_ok(result) or not result[1]:
-        return err(f"select_past_modes: concept {cid} not found")
-
-    tag = result[1][0]["tag"]
-
     if dimensions:
-        # Complex query with dimension matching - match by TAG instead of CID
-        # For each fact, check if it has ALL the dimensions with matching members
-        query = """
+        # Dimension matching in a single grouped pass over the fact's
+        # dimension rows: a fact qualifies when it has exactly as many
+        # dimensions as requested and every one of them matches.
+        values = ",".join(["(?, ?)"] * len(dimensions))
+        query = f"""
             SELECT DISTINCT ctx.mode, d.fiscal_period
             FROM facts f
             JOIN concepts c ON f.cid = c.cid
@@ -90,27 +99,17 @@ def select_past_modes(conn: sqlite3.Connection, cik: str, fiscal_year: str, cid:
             JOIN filings fil ON fr.access_no = fil.access_no
             JOIN dei d ON fr.access_no = d.access_no
             JOIN contexts ctx ON f.xid = ctx.xid
+            JOIN dimensions dim ON dim.fid = f.fid
             WHERE fil.cik = ?
             AND d.fiscal_year = ?
-            AND c.tag = ?
-            AND (
-                SELECT COUNT(*) FROM dimensions dim
-                WHERE dim.fid = f.fid
-            ) = ?
+            AND c.tag = (SELECT tag FROM concepts WHERE cid = ?)
+            GROUP BY f.fid
+            HAVING COUNT(*) = ?
+            AND SUM((dim.dimension, dim.member) IN (VALUES {values})) = ?
         """
-        params = [cik, fiscal_year, tag, len(dimensions)]
-
-        # Add dimension match conditions
-        for dim_name, dim_member in dimensions.items():
-            query += """
-                AND EXISTS (
-                    SELECT 1 FROM dimensions dim
-                    WHERE dim.fid = f.fid
-                    AND dim.dimension = ?
-                    AND dim.member = ?
-                )
-            """
-            params.extend([dim_name, dim_member])
+        params = [cik, fiscal_year, cid, len(dimensions)]
+        params.extend(value for item in dimensions.items() for value in item)
+        params.append(len(dimensions))
 
         return db.store.select(conn, query, tuple(params))
     else:
@@ -125,13 +124,13 @@ def select_past_modes(conn: sqlite3.Connection, cik: str, fiscal_year: str, cid:
             JOIN contexts ctx ON f.xid = ctx.xid
             WHERE fil.cik = ?
             AND d.fiscal_year = ?
-            AND c.tag = ?
+            AND c.tag = (SELECT tag FROM concepts WHERE cid = ?)
             AND NOT EXISTS (
                 SELECT 1 FROM dimensions dim
                 WHERE dim.fid = f.fid
             )
         """
-        return db.store.select(conn, query, (cik, fiscal_year, tag))
+        return db.store.select(conn, query, (cik, fiscal_year, cid))
 
 
 def insert(conn: sqlite3.Connection, facts_list: list[dict[str, Any]]) -> Result[int, str]:
@@ -139,12 +138,14 @@ def insert(conn: sqlite3.Connection, facts_list: list[dict[str, Any]]) -> Result
     Bulk insert facts with their dimensions and contexts.
     Returns count of facts inserted.
 
-    For each fact record:
-      1. Insert/get context (start_date, end_date, mode) -> xid
-      2. Insert/get unit (unit name) -> unid
-      3. Get rid from roles (access_no + role)
-      4. Insert fact (rid, cid, xid, unid, value) -> fid
-      5. If dimensions exist, insert into dimensions table
+    Steps:
+      1. Insert/get distinct contexts (start_date, end_date, mode) -> xid
+      2. Insert/get distinct units (unit name) -> unid
+      3. Insert/get distinct roles (access_no + role) -> rid
+      4. Insert all facts (rid, cid, xid, unid, value) in one batch -> fid
+      5. Insert all dimensions in one batch
+
+    Records missing a required field (most commonly the unit) are skipped.
 
     fact record contains:
       - access_no
@@ -155,73 +156,112 @@ def insert(conn: sqlite3.Connection, facts_list: list[dict[str, Any]]) -> Result
       - unit
       - dimensions (dict of {dim: member})
       - has_dimensions (bool)
+
+    All rows are written inside one db.store.transaction() and committed
+    once at the end. Called inside a caller's db.store.transaction(), the
+    batch joins it and the caller commits. Records missing a unit or any
+    other required field are skipped up front; any database error rolls
+    back the whole batch.
     """
+    # Validate up front so the insert loop needs no exception handling.
+    # Records without a unit (or any other required field) are skipped.
+    facts_list = [
+        fact for fact in facts_list
+        if fact.get("unit") and all(fact.get(key) is not None for key in _REQUIRED_FIELDS)
+    ]
     if not facts_list:
         return ok(0)
 
-    inserted_count = 0
+    try:
+        with db.store.transaction(conn):
+            result = _insert_batch(conn, facts_list)
+            if is_not_ok(result):
+                conn.rollback()
+            return result
+    except sqlite3.Error as e:
+        return err(f"queries.facts.insert() sqlite error: {e}")
 
+
+def _insert_batch(conn: sqlite3.Connection, facts_list: list[dict[str, Any]]) -> Result[int, str]:
+    """
+    Write a validated batch of facts inside the caller's transaction.
+    Nothing is committed here.
+    """
+    # 1-3. Resolve the shared keys once for the whole batch. Each fact's
+    # context key is built once and reused for the lookup below. Dates
+    # arrive as date objects shared by many facts, so each distinct
+    # context is formatted once.
+    context_keys = {}
+    fact_contexts = []
     for fact in facts_list:
-        try:
-            # 1. Get or create context
-            result = _insert_context(conn, str(fact["start_date"]), str(fact["end_date"]), fact["mode"])
-            if is_not_ok(result):
-                continue  # Skip this fact
-            xid = result[1]
-
-            # 2. Get or create unit
-            if fact.get("unit"):
-                result = _insert_unit(conn, fact["unit"])
-                if is_not_ok(result):
-                    continue
-                unid = result[1]
-            else:
-                # No unit - skip this fact
-                continue
-
-            # 3. Get rid from roles
-            result = db.queries.roles.insert_or_ignore(conn, fact["access_no"], fact["role"])
-            if is_not_ok(result):
-                continue
-            rid = result[1]
-
-            # 4. Insert fact
-            fact_data = [{
-                "rid": rid,
-                "cid": fact["cid"],
-                "xid": xid,
-                "unid": unid,
-                "value": fact["value"],
-                "decimals": fact.get("decimals")
-            }]
-
-            result = db.store.insert_or_ignore(conn, "facts", fact_data)
-            if is_not_ok(result):
-                continue
-
-            # Get the fid of the inserted/existing fact
-            query = "SELECT fid FROM facts WHERE rid = ? AND cid = ? AND xid = ? AND unid = ?"
-            result = db.store.select(conn, query, (rid, fact["cid"], xid, unid))
-            if is_not_ok(result) or not result[1]:
-                continue
-
-            fid = result[1][0]["fid"]
-            inserted_count += 1
-
-            # 5. Insert dimensions if present
-            if fact.get("has_dimensions") and fact.get("dimensions"):
-                dim_records = [
-                    {"fid": fid, "dimension": dim_name, "member": dim_member}
-                    for dim_name, dim_member in fact["dimensions"].items()
-                ]
-                db.store.insert_or_ignore(conn, "dimensions", dim_records)
-
-        except Exception:
-            # Skip this fact and continue with others
+        raw_key = (fact["start_date"], fact["end_date"], fact["mode"])
+        context_key = context_keys.get(raw_key)
+        if context_key is None:
+            context_key = context_keys[raw_key] = (str(raw_key[0]), str(raw_key[1]), raw_key[2])
+        fact_contexts.append(context_key)
+    result = _insert_contexts(conn, list(dict.fromkeys(context_keys.values())))
+    if is_not_ok(result):
+        return result
+    xids = result[1]
+
+    result = _insert_units(conn, list(dict.fromkeys(fact["unit"] for fact in facts_list)))
+    if is_not_ok(result):
+        return result
+    unids = result[1]
+
+    role_keys = list(dict.fromkeys((fact["access_no"], fact["role"]) for fact in facts_list))
+    result = db.queries.roles.insert_many(conn, role_keys, commit=False)
+    if is_not_ok(result):
+        return result
+    rids = result[1]
+
+    # 4. Insert all facts, getting fids back from the same statements
+    fact_keys = []
+    fact_data = []
+    for fact, context_key in zip(facts_list, fact_contexts):
+        xid = xids.get(context_key)
+        unid = unids.get(fact["unit"])
+        rid = rids.get((fact["access_no"], fact["role"]))
+        if xid is None or unid is None or rid is None:
+            fact_keys.append(None)  # Skip this fact
             continue
 
-    return ok(inserted_count)
+        fact_keys.append((rid, fact["cid"], xid, unid))
+        fact_data.append({
+            "rid": rid,
+            "cid": fact["cid"],
+            "xid": xid,
+            "unid": unid,
+            "value": fact["value"],
+            "decimals": fact.get("decimals")
+        })
+
+    result = db.store.insert_returning(conn, "facts", fact_data, ["rid", "cid", "xid", "unid"], "fid", commit=False)
+    if is_not_ok(result):
+        return result
+    fids = result[1]
 
+    inserted_count = 0
+    dim_records = []
+
+    for fact, key in zip(facts_list, fact_keys):
+        fid = fids.get(key)
+        if fid is None:
+            continue
+        inserted_count += 1
+
+        if fact.get("has_dimensions") and fact.get("dimensions"):
+            dim_records.extend(
+                {"fid": fid, "dimension": dim_name, "member": dim_member}
+                for dim_name, dim_member in fact["dimensions"].items()
+            )
+
+    # 5. Insert dimensions for every fact in one executemany
+    result = db.store.insert_or_ignore(conn, "dimensions", dim_records, commit=False)
+    if is_not_ok(result):
+        return result
+
+    return ok(inserted_count)
 
 
 def select_group(
@@ -234,124 +274,124 @@ def select_group(
     Get all facts for a CIK and group, performing concept pattern matching
     and complex joining required for the report generation.
     """
-    
-    # 1. Get group ID (Simplified using helper)
-    result = db.queries.groups.get_id(conn, group_name)
+    result = _select_group_query(conn, cik, group_name, date_filters)
     if is_not_ok(result):
         return result
-    group_id = result[1]
-    if group_id is None:
-        return err(f"group '{group_name}' not found")
+    query, params = result[1]
+    return db.store.select(conn, query, params)
 
-    # 2. Get concept patterns for this group/CIK
-    query = """
-        SELECT cp.name, cp.pattern
-        FROM concept_patterns cp
-        JOIN group_concept_patterns gcp ON cp.pid = gcp.pid
-        WHERE gcp.gid = ? AND cp.cik = ?
+
+def select_group_iter(
+    conn: sqlite3.Connection,
+    cik: str,
+    group_name: str,
+    date_filters: list[tuple[str, str, str]] | None
+) -> Result[Iterator[dict[str, Any]], str]:
+    """
+    Like select_group(), but yields the fact dicts one at a time from the
+    cursor instead of building the whole list. For callers that consume
+    the rows once. A database error while iterating raises sqlite3.Error.
     """
-    result = db.store.select(conn, query, (group_id, cik))
+    result = _select_group_query(conn, cik, group_name, date_filters)
     if is_not_ok(result):
         return result
+    query, params = result[1]
+    result = db.store.select_iter(conn, query, params)
+    if is_not_ok(result):
+        return result
+    return ok(map(dict, result[1]))
 
-    patterns = result[1]
-    if not patterns:
-        return ok([])  
 
-    # 3. Get all concepts for this CIK (Custom query required for the 'balance' field)
-    query = "SELECT cid, tag, balance FROM concepts WHERE cik = ?"
-    result = db.store.select(conn, query, (cik,))
+def _select_group_query(
+    conn: sqlite3.Connection,
+    cik: str,
+    group_name: str,
+    date_filters: list[tuple[str, str, str]] | None
+) -> Result[tuple[str, tuple], str]:
+    """
+    Build the select_group statement and its parameters.
+    """
+    # 1. Group ID and the entity's patterns in one round trip. The LEFT
+    #    JOINs keep the group row when it has no patterns for this CIK, so
+    #    an empty result still means the group does not exist.
+    query = """
+        SELECT g.gid, cp.pid, cp.pattern
+        FROM groups g
+        LEFT JOIN group_concept_patterns gcp ON gcp.gid = g.gid
+        LEFT JOIN concept_patterns cp ON cp.pid = gcp.pid AND cp.cik = ?
+        WHERE g.name = ?
+    """
+    result = db.store.select(conn, query, (cik, group_name))
     if is_not_ok(result):
         return result
+    rows = result[1]
+    if not rows:
+        return err(f"group '{group_name}' not found")
+    group_id = rows[0]["gid"]
+
+    # 2. GLOB pre-filters for anchored patterns, keyed by pattern id
+    hints = {row["pid"]: _glob_hint(row["pattern"]) for row in rows if row["pid"] is not None}
+    hints = json.dumps({pid: hint for pid, hint in hints.items() if hint})
+
+    # 3. Date filters, checked against the whitelist before any SQL is built
+    date_filters = date_filters or []
+    for field, operator, _ in date_filters:
+        if (field, operator) not in _DATE_FILTER_SQL:
+            return err(f"queries.facts.select_group: invalid date filter '{field} {operator}'")
 
-    all_concepts = result[1]
-
-    # 4. Match concepts to patterns (Application logic)
-    # A tag can match multiple patterns - all matches are kept (no "first match wins")
-    tag_to_pattern_names: dict[str, list[str]] = {}
-    matched_concept_ids: set[int] = set()
-
-    for concept_row in all_concepts:
-        cid = concept_row["cid"]
-        tag = concept_row["tag"]
-
-        for pattern_row in patterns:
-            pattern_name = pattern_row["name"]
-            pattern = pattern_row["pattern"]
-
-            try:
-                regex = re.compile(pattern)
-                if regex.search(tag):
-                    if tag not in tag_to_pattern_names:
-                        tag_to_pattern_names[tag] = []
-                    tag_to_pattern_names[tag].append(pattern_name)
-                    matched_concept_ids.add(cid)
-            except re.error:
-                continue
-
-    if not matched_concept_ids:
-        return ok([])
-
-    # 5. Query facts for matched concepts (The main bespoke join)
-    placeholders = ",".join("?" * len(matched_concept_ids))
-    query = f"""
+    query = _select_group_sql(tuple((field, operator) for field, operator, _ in date_filters))
+    params = (hints, group_id, cik, cik) + tuple(value for _, _, value in date_filters)
+
+    return ok((query, params))
+
+
+@lru_cache(maxsize=64)
+def _select_group_sql(date_ops: tuple[tuple[str, str], ...]) -> str:
+    """
+    Return the select_group statement for the given (field, operator)
+    date filters. Cached, so every call with the same filters gets the
+    same string object: no rebuilding, and the statement cache lookup
+    reuses the string's hash.
+
+    Patterns are matched against the entity's concepts inside SQLite
+    (REGEXP) and joined straight to their facts. A fact whose tag matches
+    several patterns is returned once per pattern name. Invalid patterns
+    never match. GLOB runs in C ahead of REGEXP, so anchored patterns only
+    reach Python for tags with the right prefix. CROSS JOIN pins the loop
+    order to the order written: patterns and their hint first, then
+    concepts, then facts and their lookups, so REGEXP runs at most once
+    per (concept, pattern) pair rather than once per fact row whatever the
+    planner statistics say.
+    """
+    query = """
         SELECT
-            c.cid,
-            c.tag,
-            c.balance,
+            cp.name AS concept_name,
             d.fiscal_year,
             d.fiscal_period,
             f.value,
             f.decimals,
+            c.balance,
+            c.tag,
             ctx.mode,
             ctx.end_date
-        FROM facts f
-        JOIN roles fr ON f.rid = fr.rid
-        JOIN filings fi ON fr.access_no = fi.access_no
-        JOIN dei d ON fi.access_no = d.access_no
-        JOIN concepts c ON f.cid = c.cid
-        JOIN contexts ctx ON f.xid = ctx.xid
-        WHERE fi.cik = ?
-          AND c.cid IN ({placeholders})
+        FROM group_concept_patterns gcp
+        CROSS JOIN concept_patterns cp ON cp.pid = gcp.pid
+        LEFT JOIN json_each(?) h ON h.key = cp.pid
+        CROSS JOIN concepts c ON c.cik = cp.cik
+            AND c.tag GLOB COALESCE(h.value, '*')
+            AND c.tag REGEXP cp.pattern
+        CROSS JOIN facts f ON f.cid = c.cid
+        CROSS JOIN roles fr ON f.rid = fr.rid
+        CROSS JOIN filings fi ON fr.access_no = fi.access_no
+        CROSS JOIN dei d ON fi.access_no = d.access_no
+        CROSS JOIN contexts ctx ON f.xid = ctx.xid
+        WHERE gcp.gid = ?
+          AND cp.cik = ?
+          AND fi.cik = ?
     """
-
-    params = [cik] + list(matched_concept_ids)
-
-    # Add date filters if specified
-    if date_filters:
-        for field, operator, value in date_filters:
-            query += f" AND ctx.{field} {operator} ?"
-            params.append(value)
-
-    query += " ORDER BY d.fiscal_year, d.fiscal_period, c.tag"
-
-    result = db.store.select(conn, query, params)
-    if is_not_ok(result):
-        return result
-
-    fact_rows = result[1]
-
-    # 6. Map tags to pattern names in the output (Final application logic)
-    # Each fact can appear under multiple concept names if the tag matches multiple patterns
-    facts = []
-    for row in fact_rows:
-        tag = row["tag"]
-        pattern_names = tag_to_pattern_names.get(tag, [])
-
-        for pattern_name in pattern_names:
-            facts.append({
-                "concept_name": pattern_name,
-                "fiscal_year": row["fiscal_year"],
-                "fiscal_period": row["fiscal_period"],
-                "value": row["value"],
-                "decimals": row["decimals"],
-                "balance": row["balance"],
-                "tag": row["tag"],
-                "mode": row["mode"],
-                "end_date": row["end_date"]
-            })
-
-    return ok(facts)
+    query += "".join(_DATE_FILTER_SQL[op] for op in date_ops)
+    query += " ORDER BY d.fiscal_year, d.fiscal_period, c.tag, f.fid, cp.pid"
+    return query
 
 
 def count(conn: sqlite3.Connection, cik: str) -> Result[int, str]:
@@ -371,9 +411,4 @@ def count(conn: sqlite3.Connection, cik: str) -> Result[int, str]:
         JOIN concepts c ON f.cid = c.cid
         WHERE c.cik = ?
     """
-    result = db.store.select(conn, query, (cik,))
-    if is_ok(result):
-        count = result[1][0]["COUNT(*)"]
-        return ok(count)
-    else:
-        return result
+    return db.store.select_scalar(conn, query, (cik,))
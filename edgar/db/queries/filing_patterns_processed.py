@@ -7,10 +7,14 @@ enabling incremental builds to skip already-processed filings.
 Available functions:
     count_processed(conn, access_no, pattern_ids) -> Result[int, str]
     is_fully_processed(conn, access_no, pattern_ids) -> Result[bool, str]
-    insert(conn, access_no, pid) -> Result[int, str]
+    missing_pids(conn, access_no, pattern_ids) -> Result[list[int], str]
+    count_fully_processed(conn, access_nos, pattern_ids) -> Result[int, str]
+    insert(conn, access_no, pid, commit=True) -> Result[int, str]
+    insert_many(conn, rows, commit=True) -> Result[int, str]
 """
+import json
 import sqlite3
-from typing import List
+from typing import List, Tuple
 
 from edgar import db
 from edgar.result import Result, ok, err, is_ok
@@ -32,21 +36,13 @@ def count_processed(conn: sqlite3.Connection, access_no: str, pattern_ids: List[
     if not pattern_ids:
         return ok(0)
 
-    placeholders = ",".join("?" * len(pattern_ids))
-    query = f"""
+    query = """
         SELECT COUNT(*)
         FROM filing_patterns_processed
         WHERE access_no = ?
-        AND pid IN ({placeholders})
+        AND pid IN (SELECT value FROM json_each(?))
     """
-    params = [access_no] + pattern_ids
-
-    result = db.store.select(conn, query, tuple(params))
-    if is_ok(result):
-        count = result[1][0]["COUNT(*)"] if result[1] else 0
-        return ok(count)
-    else:
-        return result
+    return db.store.select_scalar(conn, query, (access_no, json.dumps(pattern_ids)))
 
 
 def is_fully_processed(conn: sqlite3.Connection, access_no: str, pattern_ids: List[int]) -> Result[bool, str]:
@@ -63,15 +59,89 @@ def is_fully_processed(conn: sqlite3.Connection, access_no: str, pattern_ids: Li
         ok(False) - Some patterns are missing
         err(msg) - Error message
     """
-    result = count_processed(conn, access_no, pattern_ids)
+    # Stops at the first pattern without a row instead of counting them all
+    query = """
+        SELECT NOT EXISTS (
+            SELECT 1
+            FROM json_each(?) p
+            WHERE NOT EXISTS (
+                SELECT 1
+                FROM filing_patterns_processed fpp
+                WHERE fpp.access_no = ?
+                AND fpp.pid = p.value
+            )
+        )
+    """
+    result = db.store.select_scalar(conn, query, (json.dumps(pattern_ids), access_no))
     if is_ok(result):
-        count = result[1]
-        return ok(count == len(pattern_ids))
+        return ok(bool(result[1]))
     else:
         return result
 
 
-def insert(conn: sqlite3.Connection, access_no: str, pid: int) -> Result[int, str]:
+def missing_pids(conn: sqlite3.Connection, access_no: str, pattern_ids: List[int]) -> Result[List[int], str]:
+    """
+    Return the pattern IDs not yet processed for a filing, in input order.
+
+    One anti-join for any number of patterns, so callers checking several
+    groups of the same filing can ask once and test each group locally.
+
+    Args:
+        conn: Database connection
+        access_no: Filing accession number
+        pattern_ids: List of concept pattern IDs to check
+
+    Returns:
+        ok(pids) - Pattern IDs without a processed row
+        err(msg) - Error message
+    """
+    if not pattern_ids:
+        return ok([])
+
+    query = """
+        SELECT p.value
+        FROM json_each(?) p
+        WHERE p.value NOT IN (
+            SELECT pid FROM filing_patterns_processed WHERE access_no = ?
+        )
+        ORDER BY p.key
+    """
+    return db.store.select_column(conn, query, (json.dumps(pattern_ids), access_no))
+
+
+def count_fully_processed(conn: sqlite3.Connection, access_nos: List[str], pattern_ids: List[int]) -> Result[int, str]:
+    """
+    Count the filings for which all given pattern IDs have been processed.
+
+    Same test as is_fully_processed, for many filings in one query.
+
+    Args:
+        conn: Database connection
+        access_nos: Filing accession numbers
+        pattern_ids: List of concept pattern IDs to check
+
+    Returns:
+        ok(count) - Number of fully processed filings
+        err(msg) - Error message
+    """
+    query = """
+        SELECT COUNT(*)
+        FROM json_each(?) a
+        WHERE NOT EXISTS (
+            SELECT 1
+            FROM json_each(?) p
+            WHERE NOT EXISTS (
+                SELECT 1
+                FROM filing_patterns_processed fpp
+                WHERE fpp.access_no = a.value
+                AND fpp.pid = p.value
+            )
+        )
+    """
+    return db.store.select_scalar(conn, query, (json.dumps(access_nos), json.dumps(pattern_ids)))
+
+
+def insert(conn: sqlite3.Connection, access_no: str, pid: int, commit: bool = True) -> Result[int, str]:
     """
     Mark a concept pattern as processed for a filing.
 
@@ -81,6 +151,7 @@ def insert(conn: sqlite3.Connection, access_no: str, pid: int) -> Result[int, st
         conn: Database connection
         access_no: Filing accession number
         pid: Concept pattern ID
+        commit: Commit after the insert (False when called inside a transaction)
 
     Returns:
         ok(rowcount) - Number of rows inserted (0 if already exists)
@@ -90,7 +161,25 @@ def insert(conn: sqlite3.Connection, access_no: str, pid: int) -> Result[int, st
         query = "INSERT OR IGNORE INTO filing_patterns_processed (access_no, pid) VALUES (?, ?)"
         cursor = conn.execute(query, (access_no, pid))
         count = cursor.rowcount
-        conn.commit()
+        if commit:
+            conn.commit()
         return ok(count)
     except sqlite3.Error as e:
         return err(f"queries.filing_patterns_processed.insert({access_no}, {pid}) sqlite error: {e}")
+
+
+def insert_many(conn: sqlite3.Connection, rows: List[Tuple[str, int]], commit: bool = True) -> Result[int, str]:
+    """
+    Mark several concept patterns as processed in one statement and one commit.
+
+    Args:
+        conn: Database connection
+        rows: List of (access_no, pid) pairs
+        commit: Commit after the insert (False when called inside a transaction)
+
+    Returns:
+        ok(rowcount) - Number of rows inserted (duplicates are ignored)
+        err(msg) - Error message
+    """
+    data = [{"access_no": access_no, "pid": pid} for access_no, pid in rows]
+    return db.store.insert_or_ignore(conn, "filing_patterns_processed", data, commit=commit)
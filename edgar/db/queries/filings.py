@@ -1,6 +1,7 @@
 import re
+import json
 import sqlite3
-from typing import Any, Optional
+from typing import Any, Iterator, Optional
 
 from edgar import db
 from edgar.result import Result, ok, err, is_ok, is_not_ok
@@ -15,10 +16,18 @@ def get_cik(conn: sqlite3.Connection, access_no: str) -> Result[Optional[str], s
     Get CIK for a filing.
     """
     query = "SELECT cik FROM filings WHERE access_no = ?"
-    result = db.store.select(conn, query, (access_no,))
+    return db.store.select_scalar(conn, query, (access_no,))
+
+
+def get_ciks(conn: sqlite3.Connection, access_nos: list[str]) -> Result[dict[str, str], str]:
+    """
+    Get CIKs for several filings in one query: {access_no: cik}.
+    Filings that are not in the database are left out.
+    """
+    query = "SELECT access_no, cik FROM filings WHERE access_no IN (SELECT value FROM json_each(?))"
+    result = db.store.select_iter(conn, query, (json.dumps(access_nos),))
     if is_ok(result):
-        filings = result[1]
-        return ok(filings[0]["cik"] if filings else None)
+        return ok({row["access_no"]: row["cik"] for row in result[1]})
     else:
         return result
 
@@ -28,29 +37,35 @@ def get_xbrl_url(conn: sqlite3.Connection, access_no: str) -> Result[str | None,
     Get XBRL URL for a filing.
     """
     query = "SELECT xbrl_url FROM filings WHERE access_no = ?"
-    result = db.store.select(conn, query, (access_no,))
-    if is_ok(result):
-        filings = result[1]
-        if filings:
-            return ok(filings[0]["xbrl_url"])
-        else:
-            return ok(None)  # Filing not found
-    else:
-        return result
+    return db.store.select_scalar(conn, query, (access_no,))  # None if not found
+
+
+def update_xbrl_url(conn: sqlite3.Connection, access_no: str, url: str, commit: bool = True) -> Result[int, str]:
+    """
+    Update XBRL URL for a filing. Pass commit=False when called inside a
+    transaction.
+    """
+    return update_xbrl_urls(conn, [(access_no, url)], commit=commit)
 
 
-def update_xbrl_url(conn: sqlite3.Connection, access_no: str, url: str) -> Result[int, str]:
+def update_xbrl_urls(conn: sqlite3.Connection, rows: list[tuple[str, str]], commit: bool = True) -> Result[int, str]:
     """
-    Update XBRL URL for a filing.
+    Update XBRL URLs for many filings with one prepared statement and one
+    commit. rows are (access_no, url) pairs. Returns the number of filings
+    updated.
     """
+    if not rows:
+        return ok(0)
+
     try:
         query = "UPDATE filings SET xbrl_url = ? WHERE access_no = ?"
-        cursor = conn.execute(query, (url, access_no))
+        cursor = conn.executemany(query, ((url, access_no) for access_no, url in rows))
         count = cursor.rowcount
-        conn.commit()
+        if commit:
+            conn.commit()
         return ok(count)
     except sqlite3.Error as e:
-        return err(f"queries.filings.update_xbrl_url({access_no}, ...) sqlite error: {e}")
+        return err(f"queries.filings.update_xbrl_urls({len(rows)} rows) sqlite error: {e}")
 
 
 def get_with_entity(conn: sqlite3.Connection, access_no: str) -> Result[Optional[dict[str, Any]], str]:
@@ -79,6 +94,54 @@ def get_with_entity(conn: sqlite3.Connection, access_no: str) -> Result[Optional
         return result
 
 
+def get_many_with_entity(conn: sqlite3.Connection, access_nos: list[str]) -> Result[dict[str, dict[str, Any]], str]:
+    """
+    Get filings with entity info for several filings in one query:
+    {access_no: filing}, with the same fields as get_with_entity.
+    """
+    query = """
+        SELECT  f.access_no,
+                f.cik,
+                f.form_type,
+                f.filing_date,
+                f.xbrl_url,
+                f.is_xbrl,
+                f.is_ixbrl,
+                e.ticker,
+                e.name
+        FROM filings f
+        JOIN entities e ON f.cik = e.cik
+        WHERE f.access_no IN (SELECT value FROM json_each(?))
+        """
+    result = db.store.select(conn, query, (json.dumps(access_nos),))
+    if is_ok(result):
+        return ok({filing["access_no"]: filing for filing in result[1]})
+    else:
+        return result
+
+
+# select_by_entity columns and joins; filters are appended per call
+_SELECT_BY_ENTITY_SQL = """
+        SELECT  f.access_no,
+                f.cik,
+                f.form_type,
+                f.primary_doc,
+                f.filing_date,
+                f.xbrl_url,
+                f.is_xbrl,
+                f.is_ixbrl,
+                f.is_amendment,
+                e.ticker,
+                e.name
+        FROM filings f
+        JOIN entities e ON f.cik = e.cik
+        """
+
+# select_by_entity date filter whitelists: accepted operator -> SQL operator
+_DATE_OPERATORS = {">": ">", ">=": ">=", "<": "<", "<=": "<=", "=": "=", "==": "=", "!=": "<>", "<>": "<>"}
+_DATE_FIELDS = ("filing_date",)
+
+
 def select_by_entity(conn: sqlite3.Connection,
                      ciks: Optional[list[str]] = None,
                      access_nos: Optional[list[str]] = None,
@@ -104,62 +167,101 @@ def select_by_entity(conn: sqlite3.Connection,
                    Default "DESC" (newest first) for display.
                    Use "ASC" (oldest first) for chronological data processing.
     """
-    base_query = """
-        SELECT  f.access_no,
-                f.cik,
-                f.form_type,
-                f.primary_doc,
-                f.filing_date,
-                f.xbrl_url,
-                f.is_xbrl,
-                f.is_ixbrl,
-                f.is_amendment,
-                e.ticker,
-                e.name
-        FROM filings f
-        JOIN entities e ON f.cik = e.cik
-        """
+    result = _select_by_entity_query(ciks, access_nos, form_types, date_filters, stubs_only, group_filter, sort_order)
+    if is_not_ok(result):
+        return result
+    query, params = result[1]
+    return db.store.select(conn, query, params)
+
+
+def select_by_entity_iter(conn: sqlite3.Connection,
+                          ciks: Optional[list[str]] = None,
+                          access_nos: Optional[list[str]] = None,
+                          form_types: Optional[list[str]] = None,
+                          date_filters: Optional[list[tuple[str, str, str]]] = None,
+                          stubs_only: bool = False,
+                          group_filter: Optional[set[str]] = None,
+                          sort_order: str = "DESC") -> Result[Iterator[dict[str, Any]], str]:
+    """
+    Like select_by_entity(), but yields the filing dicts one at a time from
+    the cursor instead of building the whole list. For callers that consume
+    the rows once. A database error while iterating raises sqlite3.Error.
+    """
+    result = _select_by_entity_query(ciks, access_nos, form_types, date_filters, stubs_only, group_filter, sort_order)
+    if is_not_ok(result):
+        return result
+    query, params = result[1]
+    result = db.store.select_iter(conn, query, params)
+    if is_not_ok(result):
+        return result
+    return ok(map(dict, result[1]))
+
 
+def _select_by_entity_query(ciks: Optional[list[str]],
+                            access_nos: Optional[list[str]],
+                            form_types: Optional[list[str]],
+                            date_filters: Optional[list[tuple[str, str, str]]],
+                            stubs_only: bool,
+                            group_filter: Optional[set[str]],
+                            sort_order: str) -> Result[tuple[str, tuple], str]:
+    """
+    Build the select_by_entity statement and its parameters.
+    """
     where_clauses = []
     params = []
 
-    # Build WHERE clauses based on provided filters
+    # Build WHERE clauses based on provided filters. Lists are bound as
+    # one JSON array each, so the statement text depends only on which
+    # filters are present and stays in the statement cache.
     if ciks is not None and len(ciks) > 0:
-        placeholders = ",".join("?" * len(ciks))
-        where_clauses.append(f"f.cik IN ({placeholders})")
-        params.extend(ciks)
+        where_clauses.append("f.cik IN (SELECT value FROM json_each(?))")
+        params.append(json.dumps(ciks))
 
     if access_nos is not None and len(access_nos) > 0:
-        placeholders = ",".join("?" * len(access_nos))
-        where_clauses.append(f"f.access_no IN ({placeholders})")
-        params.extend(access_nos)
+        where_clauses.append("f.access_no IN (SELECT value FROM json_each(?))")
+        params.append(json.dumps(access_nos))
 
     if form_types is not None and len(form_types) > 0:
-        placeholders = ",".join("?" * len(form_types))
-        where_clauses.append(f"f.form_type IN ({placeholders})")
-        params.extend(form_types)
+        where_clauses.append("f.form_type IN (SELECT value FROM json_each(?))")
+        params.append(json.dumps(form_types))
 
     if date_filters is not None:
         for field, operator, value in date_filters:
-            # Validate operator
-            if operator not in ['>', '>=', '<', '<=', '=', '==', '!=', '<>']:
+            # Validate and normalize operator (== to =, etc.)
+            sql_operator = _DATE_OPERATORS.get(operator)
+            if sql_operator is None:
                 return err(f"Invalid operator '{operator}' in date filter")
 
-            # Normalize operators (== to =, etc.)
-            if operator == '==':
-                operator = '='
-            elif operator == '!=':
-                operator = '<>'
-
             # Validate field (for now just filing_date, but extensible)
-            if field not in ['filing_date']:
+            if field not in _DATE_FIELDS:
                 return err(f"Invalid date field '{field}' in date filter")
 
-            where_clauses.append(f"f.{field} {operator} ?")
+            where_clauses.append(f"f.{field} {sql_operator} ?")
             params.append(value)
 
+    # If group_filter is specified, keep only filings needing processing
+    # for those groups: some concept pattern of a requested group, defined
+    # for the filing's company, has no filing_patterns_processed row.
+    # Groups that don't exist or have no patterns for the company never
+    # make a filing pending. Filtering here means rows that would be
+    # dropped are never turned into dicts.
+    if group_filter:
+        where_clauses.append("""EXISTS (
+            SELECT 1
+            FROM concept_patterns cp
+            JOIN group_concept_patterns gcp ON gcp.pid = cp.pid
+            JOIN groups g ON g.gid = gcp.gid
+            WHERE cp.cik = f.cik
+            AND g.name IN (SELECT value FROM json_each(?))
+            AND NOT EXISTS (
+                SELECT 1 FROM filing_patterns_processed fpp
+                WHERE fpp.access_no = f.access_no AND fpp.pid = cp.pid
+            )
+        )""")
+        params.append(json.dumps(sorted(group_filter)))
+
     # Add stubs filter if requested (only when no group_filter specified)
-    if stubs_only and not group_filter:
+    elif stubs_only:
         # Return filings with no processed patterns (never been processed)
         where_clauses.append("""NOT EXISTS (
             SELECT 1 FROM filing_patterns_processed
@@ -168,120 +270,75 @@ def select_by_entity(conn: sqlite3.Connection,
 
     # Construct final query
     if where_clauses:
-        query = base_query + " WHERE " + " AND ".join(where_clauses)
+        query = _SELECT_BY_ENTITY_SQL + " WHERE " + " AND ".join(where_clauses)
     else:
-        query = base_query
+        query = _SELECT_BY_ENTITY_SQL
 
     # Validate and apply sort order
     if sort_order not in ["ASC", "DESC"]:
         return err(f"Invalid sort_order '{sort_order}'. Must be 'ASC' or 'DESC'.")
     query += f" ORDER BY f.filing_date {sort_order}"
 
-    # Execute the base query first
-    result = db.store.select(conn, query, tuple(params))
-    if is_not_ok(result):
-        return result
-
-    filings = result[1]
-
-    # If group_filter is specified, filter to filings needing processing for those groups
-    if group_filter:
-        filings = _filter_filings_missing_group_facts(conn, filings, group_filter)
-
-    return ok(filings)
-
-
-def _filter_filings_missing_group_facts(conn: sqlite3.Connection, filings: list[dict[str, Any]], group_filter: set[str]) -> list[dict[str, Any]]:
+    return ok((query, tuple(params)))
+
+
+# DEI upsert shared by insert_dei and insert_dei_many
+_DEI_UPSERT = """
+    INSERT INTO dei (access_no, doc_type, doc_period_end, fiscal_year,
+                   fiscal_month_day_start, fiscal_month_day_end, fiscal_period)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(access_no) DO UPDATE SET
+        doc_type = excluded.doc_type,
+        doc_period_end = excluded.doc_period_end,
+        fiscal_year = excluded.fiscal_year,
+        fiscal_month_day_start = excluded.fiscal_month_day_start,
+        fiscal_month_day_end = excluded.fiscal_month_day_end,
+        fiscal_period = excluded.fiscal_period
+"""
+
+
+def _dei_params(data: dict[str, Any]) -> tuple:
+    return (
+        data["access_no"],
+        data.get("doc_type"),
+        data.get("doc_period_end"),
+        data.get("fiscal_year"),
+        data.get("fiscal_month_day_start"),
+        data.get("fiscal_month_day_end"),
+        data.get("fiscal_period")
+    )
+
+
+def insert_dei(conn: sqlite3.Connection, data: dict[str, Any], commit: bool = True) -> Result[int, str]:
     """
-    Filter filings to only those missing processed concept patterns for specified groups.
+    Insert or update DEI (Document Entity Information) data for a filing (idempotent).
 
-    A filing needs processing if ANY concept pattern for a group hasn't been probed yet.
-    This is determined by checking the filing_patterns_processed table.
+    Uses UPSERT to handle duplicate access_no - updates existing record if present.
+    Pass commit=False when called inside a transaction.
     """
-    if not filings or not group_filter:
-        return filings
-
-    filtered = []
-
-    for filing in filings:
-        access_no = filing["access_no"]
-        cik = filing["cik"]
-
-        # Check if this filing is missing processed patterns for ANY of the specified groups
-        needs_processing = False
-
-        for group_name in group_filter:
-            # Get the group ID
-            result = db.queries.groups.get_id(conn, group_name)
-            if is_not_ok(result) or result[1] is None:
-                continue  # Group doesn't exist, skip
-
-            gid = result[1]
-
-            # Get concept patterns for this group
-            result = db.queries.concept_patterns.select_by_group(conn, gid, cik)
-            if is_not_ok(result):
-                continue
-
-            concept_patterns = result[1]
-            if not concept_patterns:
-                continue  # No concept patterns for this group
-
-            # Check if all concept patterns have been processed for this filing
-            pattern_ids = [p["pid"] for p in concept_patterns]
-
-            if not pattern_ids:
-                continue
-
-            # Check if all patterns have been processed
-            result = db.queries.filing_patterns_processed.is_fully_processed(conn, access_no, pattern_ids)
-            if is_not_ok(result):
-                continue
-
-            fully_processed = result[1]
-
-            # If not fully processed, this filing needs processing
-            if not fully_processed:
-                needs_processing = True
-                break
-
-        if needs_processing:
-            filtered.append(filing)
-
-    return filtered
+    try:
+        cursor = conn.execute(_DEI_UPSERT, _dei_params(data))
+        count = cursor.rowcount
+        if commit:
+            conn.commit()
+        return ok(count)
+    except sqlite3.Error as e:
+        return err(f"queries.filings.insert_dei({data.get('access_no')}) sqlite error: {e}")
 
 
-def insert_dei(conn: sqlite3.Connection, data: dict[str, Any]) -> Result[int, str]:
+def insert_dei_many(conn: sqlite3.Connection, data: list[dict[str, Any]], commit: bool = True) -> Result[int, str]:
     """
-    Insert or update DEI (Document Entity Information) data for a filing (idempotent).
-
-    Uses UPSERT to handle duplicate access_no - updates existing record if present.
+    Insert or update DEI data for many filings with one prepared statement
+    and one commit. Same UPSERT as insert_dei.
     """
+    if not data:
+        return ok(0)
+
     try:
-        query = """
-            INSERT INTO dei (access_no, doc_type, doc_period_end, fiscal_year,
-                           fiscal_month_day_start, fiscal_month_day_end, fiscal_period)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(access_no) DO UPDATE SET
-                doc_type = excluded.doc_type,
-                doc_period_end = excluded.doc_period_end,
-                fiscal_year = excluded.fiscal_year,
-                fiscal_month_day_start = excluded.fiscal_month_day_start,
-                fiscal_month_day_end = excluded.fiscal_month_day_end,
-                fiscal_period = excluded.fiscal_period
-        """
-        params = (
-            data["access_no"],
-            data.get("doc_type"),
-            data.get("doc_period_end"),
-            data.get("fiscal_year"),
-            data.get("fiscal_month_day_start"),
-            data.get("fiscal_month_day_end"),
-            data.get("fiscal_period")
-        )
-        cursor = conn.execute(query, params)
+        cursor = conn.executemany(_DEI_UPSERT, [_dei_params(row) for row in data])
         count = cursor.rowcount
-        conn.commit()
+        if commit:
+            conn.commit()
         return ok(count)
     except sqlite3.Error as e:
-        return err(f"queries.filings.insert_dei({data.get('access_no')}) sqlite error: {e}")
+        return err(f"queries.filings.insert_dei_many({len(data)} rows) sqlite error: {e}")
@@ -4,12 +4,12 @@ db.queries.groups - Group query functions
 Groups organize concept patterns into logical collections for financial reporting.
 
 Functions:
-    insert_or_ignore(conn, name) -> Result[int, str]
+    insert_or_ignore(conn, name, commit=True) -> Result[int, str]
     get_id(conn, name) -> Result[Optional[int], str]
     get(conn, gid) -> Result[dict, str]
     select(conn) -> Result[list[dict], str]
     update_name(conn, gid, new_name) -> Result[None, str]
-    link_concept_pattern(conn, gid, pid) -> Result[None, str]
+    link_concept_pattern(conn, gid, pid, commit=True) -> Result[None, str]
     count_patterns(conn, gid) -> Result[int, str]
 """
 import sqlite3
@@ -19,31 +19,27 @@ from edgar import db
 from edgar.result import Result, ok, err, is_ok
 
 
-def insert_or_ignore(conn: sqlite3.Connection, name: str) -> Result[int, str]:
+def insert_or_ignore(conn: sqlite3.Connection, name: str, commit: bool = True) -> Result[int, str]:
     """
     Insert group if it doesn't exist and return gid.
 
     Args:
         conn: Database connection
         name: Group name
+        commit: Commit after the insert (False when called inside a transaction)
 
     Returns:
         Result containing gid (group ID) or error message
     """
+    # Insert and get the gid (whether newly inserted or existing)
     group_data = [{"name": name}]
-    result = db.store.insert_or_ignore(conn, "groups", group_data)
+    result = db.store.insert_returning(conn, "groups", group_data, ["name"], "gid", commit=commit)
     if result[0] is False:
         return result
 
-    # Get the gid (whether newly inserted or existing)
-    query = "SELECT gid FROM groups WHERE name = ?"
-    result = db.store.select(conn, query, (name,))
-    if result[0] is False:
-        return result
-
-    groups = result[1]
-    if groups:
-        return ok(groups[0]["gid"])
+    gid = result[1].get((name,))
+    if gid is not None:
+        return ok(gid)
     else:
         return err(f"groups.insert_or_ignore({name}): group not found after insert")
 
@@ -60,12 +56,7 @@ def get_id(conn: sqlite3.Connection, name: str) -> Result[Optional[int], str]:
         Result containing gid or None if not found, or error message
     """
     query = "SELECT gid FROM groups WHERE name = ?"
-    result = db.store.select(conn, query, (name,))
-    if is_ok(result):
-        groups = result[1]
-        return ok(groups[0]["gid"] if groups else None)
-    else:
-        return result
+    return db.store.select_scalar(conn, query, (name,))
 
 
 def get(conn: sqlite3.Connection, gid: int) -> Result[dict, str]:
@@ -104,7 +95,7 @@ def select(conn: sqlite3.Connection) -> Result[list[dict[str, Any]], str]:
     return db.store.select(conn, query)
 
 
-def update_name(conn: sqlite3.Connection, gid: int, new_name: str) -> Result[None, str]:
+def update_name(conn: sqlite3.Connection, gid: int, new_name: str, commit: bool = True) -> Result[None, str]:
     """
     Update group name.
 
@@ -112,6 +103,7 @@ def update_name(conn: sqlite3.Connection, gid: int, new_name: str) -> Result[Non
         conn: Database connection
         gid: Group ID
         new_name: New group name
+        commit: Commit after the update (False when called inside a transaction)
 
     Returns:
         Result containing None on success or error message
@@ -119,7 +111,8 @@ def update_name(conn: sqlite3.Connection, gid: int, new_name: str) -> Result[Non
     try:
         query = "UPDATE groups SET name = ? WHERE gid = ?"
         cursor = conn.execute(query, (new_name, gid))
-        conn.commit()
+        if commit:
+            conn.commit()
         if cursor.rowcount == 0:
             return err(f"groups.update_name: no group with ID {gid}")
         cursor.close()
@@ -128,7 +121,7 @@ def update_name(conn: sqlite3.Connection, gid: int, new_name: str) -> Result[Non
         return err(f"groups.update_name: sqlite error: {e}")
 
 
-def link_concept_pattern(conn: sqlite3.Connection, gid: int, pid: int) -> Result[None, str]:
+def link_concept_pattern(conn: sqlite3.Connection, gid: int, pid: int, commit: bool = True) -> Result[None, str]:
     """
     Link concept pattern to group (idempotent).
 
@@ -138,12 +131,13 @@ def link_concept_pattern(conn: sqlite3.Connection, gid: int, pid: int) -> Result
         conn: Database connection
         gid: Group ID
         pid: Pattern ID (concept pattern)
+        commit: Commit after the insert (False when called inside a transaction)
 
     Returns:
         Result containing None on success or error message
     """
     link_data = [{"gid": gid, "pid": pid}]
-    result = db.store.insert_or_ignore(conn, "group_concept_patterns", link_data)
+    result = db.store.insert_or_ignore(conn, "group_concept_patterns", link_data, commit=commit)
     if is_ok(result):
         return ok(None)
     else:
@@ -162,9 +156,4 @@ def count_patterns(conn: sqlite3.Connection, gid: int) -> Result[int, str]:
         Result containing pattern count or error message
     """
     query = "SELECT COUNT(*) FROM group_concept_patterns WHERE gid = ?"
-    result = db.store.select(conn, query, (gid,))
-    if is_ok(result):
-        count = result[1][0]["COUNT(*)"]
-        return ok(count)
-    else:
-        return result
+    return db.store.select_scalar(conn, query, (gid,))
@@ -14,7 +14,6 @@ Functions:
     match_groups(conn, cik) -> Result[dict[str, list[str]], str]
     match_groups_for_filing(conn, cik, access_no) -> Result[dict[str, list[str]], str]
 """
-import re
 import sqlite3
 from typing import Any, Optional
 
@@ -146,18 +145,19 @@ def select(conn: sqlite3.Connection, group_name: Optional[str] = None, cik: Opti
     return db.store.select(conn, query, tuple(params))
 
 
-def insert(conn: sqlite3.Connection, cik: str, name: str, pattern: str, note: Optional[str] = None) -> Result[int, str]:
+def insert(conn: sqlite3.Connection, cik: str, name: str, pattern: str, note: Optional[str] = None, commit: bool = True) -> Result[int, str]:
     """
     Insert role pattern (without OR IGNORE).
 
     Raises error if pattern already exists.
-    Returns pattern ID.
+    Returns pattern ID. Pass commit=False when called inside a transaction.
     """
     try:
         query = "INSERT INTO role_patterns (cik, name, pattern, note) VALUES (?, ?, ?, ?)"
         cursor = conn.execute(query, (cik, name, pattern, note))
         pid = cursor.lastrowid
-        conn.commit()
+        if commit:
+            conn.commit()
         cursor.close()
         return ok(pid)
     except sqlite3.IntegrityError as e:
@@ -166,38 +166,33 @@ def insert(conn: sqlite3.Connection, cik: str, name: str, pattern: str, note: Op
         return err(f"queries.role_patterns.insert: sqlite error: {e}")
 
 
-def update(conn: sqlite3.Connection, pid: int, pattern: Optional[str] = None, name: Optional[str] = None, note: Optional[str] = None) -> Result[int, str]:
+def update(conn: sqlite3.Connection, pid: int, pattern: Optional[str] = None, name: Optional[str] = None, note: Optional[str] = None, commit: bool = True) -> Result[int, str]:
     """
     Update role pattern.
 
     Only updates fields that are provided (not None).
-    Returns number of rows updated.
+    Returns number of rows updated. Pass commit=False when called inside
+    a transaction.
     """
-    updates = []
-    params = []
-
-    if pattern is not None:
-        updates.append("pattern = ?")
-        params.append(pattern)
-
-    if name is not None:
-        updates.append("name = ?")
-        params.append(name)
-
-    if note is not None:
-        updates.append("note = ?")
-        params.append(note)
-
-    if not updates:
+    if all(value is None for value in (pattern, name, note)):
         return ok(0)  # Nothing to update
 
-    params.append(pid)
-    query = f"UPDATE role_patterns SET {', '.join(updates)} WHERE pid = ?"
+    # Fixed statement text: COALESCE keeps the current value for any
+    # field passed as None.
+    query = """
+        UPDATE role_patterns SET
+            pattern = COALESCE(?, pattern),
+            name = COALESCE(?, name),
+            note = COALESCE(?, note)
+        WHERE pid = ?
+    """
+    params = (pattern, name, note, pid)
 
     try:
-        cursor = conn.execute(query, tuple(params))
+        cursor = conn.execute(query, params)
         count = cursor.rowcount
-        conn.commit()
+        if commit:
+            conn.commit()
         cursor.close()
         return ok(count)
     except sqlite3.Error as e:
@@ -208,50 +203,31 @@ def match_groups(conn: sqlite3.Connection, cik: str) -> Result[dict[str, list[st
     """
     Match role patterns against actual role names for a CIK across all groups.
 
+    Runs as a single statement: roles are joined against every group's
+    patterns through the REGEXP function that db.store registers on open,
+    so role names are never pulled into Python.
+
     Returns dict mapping group_name -> list of matching role names.
     """
-    # Get all groups
-    result = db.queries.groups.select(conn)
-    if is_not_ok(result):
-        return result
-
-    groups = result[1]
-
-    # Get all role names for this CIK
-    result = db.queries.roles.select_by_entity(conn, cik)
+    query = """
+        SELECT g.name AS group_name, r.name
+        FROM groups g
+        JOIN group_role_patterns grp ON g.gid = grp.gid
+        JOIN role_patterns rp ON grp.pid = rp.pid
+        JOIN filings f ON f.cik = rp.cik
+        JOIN roles r ON r.access_no = f.access_no
+        WHERE rp.cik = ?
+        AND r.name REGEXP rp.pattern
+        GROUP BY g.gid, r.name
+        ORDER BY g.name, MIN(rp.pid), r.name
+    """
+    result = db.store.select(conn, query, (cik,))
     if is_not_ok(result):
         return result
 
-    role_names = result[1]
-
-    # For each group, get its patterns and match against role names
-    group_matches = {}
-
-    for group in groups:
-        gid = group["gid"]
-        group_name = group["group_name"]
-
-        # Get role patterns for this group
-        result = select_by_group(conn, gid, cik)
-        if is_not_ok(result):
-            return result
-
-        patterns = result[1]
-
-        # Match patterns against role names
-        matched_roles = []
-        for pattern_row in patterns:
-            pattern = pattern_row["pattern"]
-            try:
-                regex = re.compile(pattern)
-                for role_name in role_names:
-                    if regex.search(role_name) and role_name not in matched_roles:
-                        matched_roles.append(role_name)
-            except re.error:
-                continue  # Skip invalid regex patterns
-
-        if matched_roles:
-            group_matches[group_name] = matched_roles
+    group_matches: dict[str, list[str]] = {}
+    for row in result[1]:
+        group_matches.setdefault(row["group_name"], []).append(row["name"])
 
     return ok(group_matches)
 
@@ -261,7 +237,8 @@ def match_groups_for_filing(conn: sqlite3.Connection, cik: str, access_no: str)
     Match role patterns against actual role names for a specific filing across all groups.
 
     More efficient than match_groups() when processing individual filings, as it only
-    checks roles that actually exist in the filing.
+    checks roles that actually exist in the filing. Like match_groups() it runs as a
+    single statement through REGEXP; invalid patterns match nothing.
 
     Args:
         conn: Database connection
@@ -269,49 +246,26 @@ def match_groups_for_filing(conn: sqlite3.Connection, cik: str, access_no: str)
         access_no: Filing accession number
 
     Returns:
-        Result containing dict mapping group_name -> list of matching role names
+        Result containing dict mapping group_name -> list of matching role names,
+        each list in pattern order, then role name order
     """
-    # Get all groups
-    result = db.queries.groups.select(conn)
-    if is_not_ok(result):
-        return result
-
-    groups = result[1]
-
-    # Get role names for this specific filing
-    result = db.queries.roles.select_by_filing(conn, access_no)
+    query = """
+        SELECT g.name AS group_name, r.name
+        FROM groups g
+        JOIN group_role_patterns grp ON g.gid = grp.gid
+        JOIN role_patterns rp ON grp.pid = rp.pid
+        JOIN roles r ON r.access_no = ?
+        WHERE rp.cik = ?
+        AND r.name REGEXP rp.pattern
+        GROUP BY g.gid, r.name
+        ORDER BY g.name, MIN(grp.pid), r.name
+    """
+    result = db.store.select(conn, query, (access_no, cik))
     if is_not_ok(result):
         return result
 
-    role_names = result[1]
-
-    # For each group, get its patterns and match against role names
-    group_matches = {}
-
-    for group in groups:
-        gid = group["gid"]
-        group_name = group["group_name"]
-
-        # Get role patterns for this group
-        result = select_by_group(conn, gid, cik)
-        if is_not_ok(result):
-            return result
-
-        patterns = result[1]
-
-        # Match patterns against role names
-        matched_roles = []
-        for pattern_row in patterns:
-            pattern = pattern_row["pattern"]
-            try:
-                regex = re.compile(pattern)
-                for role_name in role_names:
-                    if regex.search(role_name) and role_name not in matched_roles:
-                        matched_roles.append(role_name)
-            except re.error:
-                continue  # Skip invalid regex patterns
-
-        if matched_roles:
-            group_matches[group_name] = matched_roles
+    group_matches: dict[str, list[str]] = {}
+    for row in result[1]:
+        group_matches.setdefault(row["group_name"], []).append(row["name"])
 
     return ok(group_matches)
@@ -5,14 +5,15 @@ Roles represent the different sections/statements in XBRL filings
 (e.g., Balance Sheet, Income Statement, etc.)
 
 Functions:
-    insert_or_ignore(conn, access_no, role_name) -> Result[int, str]
+    insert_or_ignore(conn, access_no, role_name, commit=True) -> Result[int, str]
+    insert_many(conn, keys, commit=True) -> Result[dict[tuple[str, str], int], str]
     select_by_filing(conn, access_no) -> Result[list[str], str]
     select_by_entity(conn, cik) -> Result[list[str], str]
     select_with_entity(conn, access_nos, pattern=None) -> Result[list[dict], str]
     count(conn, access_no) -> Result[int, str]
 """
 
-import re
+import json
 import sqlite3
 from typing import Any, Optional
 
@@ -21,7 +22,7 @@ from edgar import db
 from edgar.result import Result, ok, err, is_ok, is_not_ok
 
 
-def insert_or_ignore(conn: sqlite3.Connection, access_no: str, role_name: str) -> Result[int, str]:
+def insert_or_ignore(conn: sqlite3.Connection, access_no: str, role_name: str, commit: bool = True) -> Result[int, str]:
     """
     Insert role for a filing if it doesn't exist, return rid.
 
@@ -29,28 +30,39 @@ def insert_or_ignore(conn: sqlite3.Connection, access_no: str, role_name: str) -
         conn: Database connection
         access_no: Filing accession number
         role_name: Name of the role/statement
+        commit: Commit after the insert (False when called inside a transaction)
 
     Returns:
         Result containing rid (role ID) or error message
     """
-    # First try to insert
-    data = [{"access_no": access_no, "name": role_name}]
-    result = db.store.insert_or_ignore(conn, "roles", data)
+    # Insert and get the rid (whether newly inserted or existing)
+    result = insert_many(conn, [(access_no, role_name)], commit=commit)
     if is_not_ok(result):
         return result
 
-    # Get the rid (whether newly inserted or existing)
-    query = "SELECT rid FROM roles WHERE access_no = ? AND name = ?"
-    result = db.store.select(conn, query, (access_no, role_name))
-    if is_not_ok(result):
-        return result
-
-    if result[1]:
-        return ok(result[1][0]["rid"])
+    rid = result[1].get((access_no, role_name))
+    if rid is not None:
+        return ok(rid)
     else:
         return err(f"roles.insert_or_ignore: role not found after insert")
 
 
+def insert_many(conn: sqlite3.Connection, keys: list[tuple[str, str]], commit: bool = True) -> Result[dict[tuple[str, str], int], str]:
+    """
+    Insert roles that don't exist yet and return their rids.
+
+    Args:
+        conn: Database connection
+        keys: List of (access_no, role_name) pairs
+        commit: Commit after the insert (False when called inside a transaction)
+
+    Returns:
+        Result containing {(access_no, role_name): rid} or error message
+    """
+    data = [{"access_no": access_no, "name": role_name} for access_no, role_name in keys]
+    return db.store.insert_returning(conn, "roles", data, ["access_no", "name"], "rid", commit=commit)
+
+
 def select_by_filing(conn: sqlite3.Connection, access_no: str) -> Result[list[str], str]:
     """
     Get role names for a filing.
@@ -63,12 +75,7 @@ def select_by_filing(conn: sqlite3.Connection, access_no: str) -> Result[list[st
         Result containing list of role names or error message
     """
     query = "SELECT name FROM roles WHERE access_no = ? ORDER BY name"
-    result = db.store.select(conn, query, (access_no,))
-    if is_ok(result):
-        roles = result[1]
-        return ok([role["name"] for role in roles])
-    else:
-        return result
+    return db.store.select_column(conn, query, (access_no,))
 
 
 def select_with_entity(conn: sqlite3.Connection,
@@ -96,8 +103,13 @@ def select_with_entity(conn: sqlite3.Connection,
     if not access_nos:
         return ok([])
 
-    placeholders = ",".join("?" * len(access_nos))
-    query = f"""
+    # REGEXP treats an invalid pattern as matching nothing; report it instead
+    if pattern and db.regex.compile(pattern) is None:
+        return err(f"roles.select_with_entity: invalid regex pattern '{pattern}': {db.regex.error(pattern)}")
+
+    # The pattern filter runs in the query, so rejected roles are never
+    # turned into dicts
+    query = """
         SELECT  e.name,
                 e.ticker,
                 e.cik,
@@ -108,25 +120,12 @@ def select_with_entity(conn: sqlite3.Connection,
         FROM roles fr
         JOIN filings f ON fr.access_no = f.access_no
         JOIN entities e ON f.cik = e.cik
-        WHERE f.access_no IN ({placeholders})
+        WHERE f.access_no IN (SELECT value FROM json_each(?))
+        AND (? IS NULL OR fr.name REGEXP ?)
         ORDER BY f.filing_date DESC, e.ticker, fr.name
         """
-
-    result = db.store.select(conn, query, tuple(access_nos))
-    if is_not_ok(result):
-        return result
-
-    roles = result[1]
-
-    if pattern:
-        try:
-            rexp = re.compile(pattern)
-            filtered_roles = [role for role in roles if rexp.search(role['role_name'])]
-            return ok(filtered_roles)
-        except re.error as e:
-            return err(f"roles.select_with_entity: invalid regex pattern '{pattern}': {e}")
-
-    return ok(roles)
+    pattern = pattern or None
+    return db.store.select(conn, query, (json.dumps(list(access_nos)), pattern, pattern))
 
 
 def select_by_entity(conn: sqlite3.Connection, cik: str) -> Result[list[str], str]:
@@ -147,12 +146,7 @@ def select_by_entity(conn: sqlite3.Connection, cik: str) -> Result[list[str], st
         WHERE f.cik = ?
         ORDER BY r.name
     """
-    result = db.store.select(conn, query, (cik,))
-    if is_ok(result):
-        roles = result[1]
-        return ok([role["name"] for role in roles])
-    else:
-        return result
+    return db.store.select_column(conn, query, (cik,))
 
 
 def count(conn: sqlite3.Connection, access_no: str) -> Result[int, str]:
@@ -166,10 +160,5 @@ def count(conn: sqlite3.Connection, access_no: str) -> Result[int, str]:
     Returns:
         Result containing role count or error message
     """
-    query = "SELECT COUNT(*) as count FROM roles WHERE access_no = ?"
-    result = db.store.select(conn, query, (access_no,))
-    if is_ok(result):
-        rows = result[1]
-        return ok(rows[0]["count"] if rows else 0)
-    else:
-        return result
+    query = "SELECT COUNT(*) FROM roles WHERE access_no = ?"
+    return db.store.select_scalar(conn, query, (access_no,))
@@ -0,0 +1,46 @@
+"""
+db.regex - Compiled regex cache shared by the db modules
+
+Role and concept patterns are stored as text and applied over and over:
+by the REGEXP function on every connection and by the query modules. All
+of them compile through here, so each pattern is compiled once per
+process. The cache is bounded; least recently used patterns are evicted.
+
+Functions:
+    compile(pattern) -> re.Pattern | None
+    error(pattern) -> str | None
+    cache_info() -> functools._CacheInfo
+"""
+import re
+from functools import lru_cache
+from typing import Optional
+
+
+@lru_cache(maxsize=256)
+def compile(pattern: str) -> Optional[re.Pattern]:
+    """
+    Return the compiled pattern, or None if it is not a valid regex.
+    Invalid patterns are cached too, so they are not recompiled per row.
+    """
+    try:
+        return re.compile(pattern)
+    except re.error:
+        return None
+
+
+def error(pattern: str) -> Optional[str]:
+    """
+    Return why pattern does not compile, or None if it does.
+    """
+    try:
+        re.compile(pattern)
+        return None
+    except re.error as e:
+        return str(e)
+
+
+def cache_info():
+    """
+    Hits, misses and size of the compiled pattern cache.
+    """
+    return compile.cache_info()
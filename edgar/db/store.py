@@ -1,19 +1,116 @@
+import os
 import sys
+import json
 import sqlite3
-from typing import Any
+from pathlib import Path
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Iterator
 
 # Local modules
+from edgar.db import regex
 from edgar.result import Result, ok, err, is_ok, is_not_ok
 
 
+def _regexp(pattern: str, value: str) -> bool:
+    """
+    Backs the SQL 'value REGEXP pattern' operator with Python's re.search.
+    Invalid patterns and NULL values never match.
+    """
+    if pattern is None or value is None:
+        return False
+    compiled = regex.compile(pattern)
+    return compiled is not None and compiled.search(value) is not None
+
+
+# Per-connection cache tuning, safe on read-only connections too
+_TUNING_PRAGMAS = """
+    PRAGMA temp_store = MEMORY;
+    PRAGMA mmap_size = 268435456;
+    PRAGMA cache_size = -65536;
+"""
+
+# Per-connection settings for connections that write
+_WRITE_PRAGMAS = _TUNING_PRAGMAS + """
+    PRAGMA foreign_keys = ON;
+    PRAGMA synchronous = NORMAL;
+"""
+
+
+# Prepared statements kept per connection, keyed by SQL text. The query
+# modules use fixed statement shapes, but multi-row inserts and bucketed
+# IN lists add one shape per size, so the default of 128 would evict hot
+# statements during a build.
+_CACHED_STATEMENTS = 512
+
+
+def connect(db_path: str, read_only: bool = False) -> Result[sqlite3.Connection, str]:
+    """
+    Open a connection with the REGEXP function registered, a larger
+    prepared-statement cache and the per-connection PRAGMAs applied, so
+    connections that never call init() are tuned as well.
+
+    Read-only connections are opened with mode=ro and PRAGMA query_only, so
+    they never take the write lock and cannot modify the database. They skip
+    init(): the database must already exist, and a missing file is reported
+    as an error rather than created.
+    """
+    if read_only and not os.path.exists(db_path):
+        return err(f"db.connect({db_path}): database not found, run 'ep build' first")
+
+    try:
+        if read_only:
+            uri = Path(db_path).resolve().as_uri() + "?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, cached_statements=_CACHED_STATEMENTS)
+        else:
+            conn = sqlite3.connect(db_path, cached_statements=_CACHED_STATEMENTS)
+    except sqlite3.Error as e:
+        return err(f"db.connect({db_path}) sqlite3 error: {e}")
+
+    result = configure(conn, read_only)
+    if is_not_ok(result):
+        conn.close()
+        return result
+    return ok(conn)
+
+
+def configure(conn: sqlite3.Connection, read_only: bool = False) -> Result[None, str]:
+    """
+    Apply the per-connection settings: REGEXP, cache tuning and, for
+    connections that write, foreign keys, synchronous=NORMAL and WAL.
+
+    WAL is only requested for file databases; an in-memory database has
+    no journal file to switch. The mode is stored in the file, so after
+    the first connection this is a no-op. The same goes for the page
+    size, which must be set before WAL is entered and only takes effect
+    on a new, empty database (existing files keep theirs until a VACUUM
+    outside WAL mode).
+    """
+    try:
+        conn.create_function("REGEXP", 2, _regexp, deterministic=True)
+        if read_only:
+            conn.executescript("PRAGMA query_only = ON;" + _TUNING_PRAGMAS)
+            return ok(None)
+
+        conn.executescript(_WRITE_PRAGMAS)
+        in_memory = conn.execute("SELECT file FROM pragma_database_list WHERE name = 'main'").fetchone()[0] == ""
+        if not in_memory:
+            conn.execute("PRAGMA page_size = 8192")
+            conn.execute("PRAGMA journal_mode = WAL")
+        return ok(None)
+    except sqlite3.Error as e:
+        return err(f"db.configure() sqlite3 error: {e}")
+
+
 def init(conn: sqlite3.Connection) -> Result[None,str]:
+    result = configure(conn)
+    if is_not_ok(result):
+        return result
+
     cursor = None
     try:
         cursor = conn.cursor()
         cursor.executescript("""
-
-            PRAGMA foreign_keys = ON;
-
             CREATE TABLE IF NOT EXISTS entities (
                 cik             TEXT PRIMARY KEY,
                 ticker          TEXT NOT NULL,
@@ -31,6 +128,10 @@ def init(conn: sqlite3.Connection) -> Result[None,str]:
                 UNIQUE (cik, taxonomy, tag)
             );
 
+            -- Fact lookups by tag span every taxonomy of the concept
+            CREATE INDEX IF NOT EXISTS idx_concepts_tag
+                ON concepts(tag);
+
             CREATE TABLE IF NOT EXISTS filings (
                 access_no       TEXT PRIMARY KEY,
                 cik             TEXT NOT NULL,
@@ -44,6 +145,9 @@ def init(conn: sqlite3.Connection) -> Result[None,str]:
                 FOREIGN KEY (cik) REFERENCES entities(cik) ON DELETE CASCADE
             );
 
+            CREATE INDEX IF NOT EXISTS idx_filings_cik
+                ON filings(cik, access_no);
+
             -- Document Entity Information
             CREATE TABLE IF NOT EXISTS dei (
                 did                     INTEGER PRIMARY KEY,
@@ -57,6 +161,10 @@ def init(conn: sqlite3.Connection) -> Result[None,str]:
                 FOREIGN KEY (access_no) REFERENCES filings(access_no) ON DELETE CASCADE
             );
 
+            -- Covers the fiscal year/period lookups joined in from facts
+            CREATE INDEX IF NOT EXISTS idx_dei_fiscal
+                ON dei(access_no, fiscal_year, fiscal_period);
+
             CREATE TABLE IF NOT EXISTS roles (
                 rid         INTEGER PRIMARY KEY,
                 access_no   TEXT NOT NULL,
@@ -73,6 +181,9 @@ def init(conn: sqlite3.Connection) -> Result[None,str]:
                 FOREIGN KEY (cid) REFERENCES concepts(cid) ON DELETE CASCADE
             );
 
+            CREATE INDEX IF NOT EXISTS idx_role_concepts_cid
+                ON role_concepts(cid, rid);
+
             -- Financial contexts (periods)
             CREATE TABLE IF NOT EXISTS contexts (
                 xid             INTEGER PRIMARY KEY,
@@ -106,6 +217,9 @@ def init(conn: sqlite3.Connection) -> Result[None,str]:
                 UNIQUE (rid, cid, xid, unid)
             );
 
+            CREATE INDEX IF NOT EXISTS idx_facts_cid
+                ON facts(cid, rid);
+
             -- Dimensional breakdowns for facts
             CREATE TABLE IF NOT EXISTS dimensions (
                 fid             INTEGER NOT NULL,
@@ -115,6 +229,9 @@ def init(conn: sqlite3.Connection) -> Result[None,str]:
                 PRIMARY KEY (fid, dimension)
             );
 
+            CREATE INDEX IF NOT EXISTS idx_dimensions_member
+                ON dimensions(fid, dimension, member);
+
             CREATE TABLE IF NOT EXISTS groups (
                 gid             INTEGER PRIMARY KEY,
                 name            TEXT NOT NULL UNIQUE
@@ -161,6 +278,9 @@ def init(conn: sqlite3.Connection) -> Result[None,str]:
                 FOREIGN KEY (pid) REFERENCES concept_patterns(pid) ON DELETE CASCADE
             );
 
+            CREATE INDEX IF NOT EXISTS idx_group_concept_patterns_pid
+                ON group_concept_patterns(pid, gid);
+
             -- Track which concept patterns have been processed for each filing
             -- This allows incremental builds to skip already-processed filings
             CREATE TABLE IF NOT EXISTS filing_patterns_processed (
@@ -180,10 +300,76 @@ def init(conn: sqlite3.Connection) -> Result[None,str]:
         return err(f"db.init() sqlite3 error: {e}")
 
 
+# Connections (by id) currently inside a transaction() block
+_open_transactions: set[int] = set()
+
+
+@contextmanager
+def transaction(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    """
+    Run a block of writes as one IMMEDIATE transaction.
+
+    Any implicit transaction already open on the connection is committed
+    first. The block is committed when it exits normally and rolled back
+    when it raises. Writes inside the block should pass commit=False; a
+    block that returns an error should roll back itself before returning,
+    which leaves nothing to commit here.
+
+    A transaction() entered inside another one on the same connection
+    joins it: it neither begins nor commits, and the outer block decides.
+    An exception still rolls back the whole transaction before it
+    propagates, so callers that turn it into an error result cannot
+    commit half of the work.
+    """
+    key = id(conn)
+    if key in _open_transactions:
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        return
+
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+    _open_transactions.add(key)
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        _open_transactions.discard(key)
+    if conn.in_transaction:
+        try:
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+
+
+def optimize(conn: sqlite3.Connection) -> Result[None, str]:
+    """
+    Refresh query planner statistics after bulk writes.
+
+    PRAGMA optimize only runs ANALYZE on tables whose statistics are
+    missing or stale, so it is cheap to call before closing a connection.
+    """
+    try:
+        conn.execute("PRAGMA optimize")
+        return ok(None)
+    except sqlite3.Error as e:
+        return err(f"db.optimize() sqlite3 error: {e}")
+
+
 def select(conn: sqlite3.Connection, query: str, params: tuple = ()) -> Result[list[dict[str, Any]], str]:
     cursor = None
     try:
         cursor = conn.cursor()
+        # Plain tuples: the dicts are built here, so a connection-level
+        # sqlite3.Row factory would only add an object per row
+        cursor.row_factory = None
         cursor.execute(query, params)
         keys = [desc[0] for desc in cursor.description]
         data = [dict(zip(keys, values)) for values in cursor.fetchall()]
@@ -195,62 +381,213 @@ def select(conn: sqlite3.Connection, query: str, params: tuple = ()) -> Result[l
         return err(f"db.select(...) sqlite3 error: {e}")
 
 
-def insert(conn: sqlite3.Connection, table: str, data: list[dict[str, Any]]) -> Result[int, str]:
+def select_iter(conn: sqlite3.Connection, query: str, params: tuple = ()) -> Result[Iterator[sqlite3.Row], str]:
+    """
+    Like select(), but returns the cursor itself so rows stream as
+    sqlite3.Row objects instead of being materialized into a list of dicts.
+    Meant for results that are consumed once.
+    """
+    try:
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        cursor.execute(query, params)
+        return ok(cursor)
+    except sqlite3.Error as e:
+        return err(f"db.select_iter(...) sqlite3 error: {e}")
+
+
+def select_scalar(conn: sqlite3.Connection, query: str, params: tuple = ()) -> Result[Any, str]:
+    """
+    Return the first column of the first row, or None when there are no
+    rows. For id lookups and counts, which need no per-row dict.
+    """
+    cursor = None
+    try:
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        cursor.execute(query, params)
+        row = cursor.fetchone()
+        cursor.close()
+        return ok(row[0] if row else None)
+    except sqlite3.Error as e:
+        if cursor:
+            cursor.close()
+        return err(f"db.select_scalar(...) sqlite3 error: {e}")
+
+
+def select_column(conn: sqlite3.Connection, query: str, params: tuple = ()) -> Result[list[Any], str]:
+    """
+    Return the first column of every row as a list.
+    """
+    cursor = None
+    try:
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        cursor.execute(query, params)
+        data = [row[0] for row in cursor.fetchall()]
+        cursor.close()
+        return ok(data)
+    except sqlite3.Error as e:
+        if cursor:
+            cursor.close()
+        return err(f"db.select_column(...) sqlite3 error: {e}")
+
+
+# Conservative bound on parameters per statement (SQLite < 3.32 allows 999)
+_MAX_PARAMS = 999
+
+
+@lru_cache(maxsize=256)
+def _values_sql(verb: str, table: str, columns: tuple[str, ...], rows: int) -> str:
+    """
+    Statement text for a multi-row insert of 'rows' rows. Cached so batches
+    of the same shape reuse one string.
+    """
+    row_str = "(" + ", ".join("?" * len(columns)) + ")"
+    return f"{verb} INTO {table} ({', '.join(columns)}) VALUES {', '.join([row_str] * rows)}"
+
+
+def _insert_rows(cursor: sqlite3.Cursor, verb: str, table: str, data: list[dict[str, Any]]) -> int:
+    """
+    Insert the rows with multi-row VALUES statements, as many rows per
+    statement as the parameter limit allows, so SQLite runs one statement
+    per chunk instead of one per row. Columns come from the first row.
+    Returns the number of rows inserted.
+    """
+    columns = tuple(data[0])
+    step = max(1, _MAX_PARAMS // len(columns))
+    count = 0
+    for i in range(0, len(data), step):
+        chunk = data[i:i + step]
+        cursor.execute(_values_sql(verb, table, columns, len(chunk)), [row[c] for row in chunk for c in columns])
+        count += cursor.rowcount
+    return count
+
+
+def insert(conn: sqlite3.Connection, table: str, data: list[dict[str, Any]], commit: bool = True) -> Result[int, str]:
     if not data:
         return ok(0)
 
     cursor = None
     try:
-        key_str = ", ".join(data[0].keys())
-        val_str = ", ".join(f":{k}" for k in data[0].keys())
-        query = f"INSERT INTO {table} ({key_str}) VALUES ({val_str});"
-
         cursor = conn.cursor()
-        cursor.executemany(query, data)
-        count = cursor.rowcount
+        count = _insert_rows(cursor, "INSERT", table, data)
         cursor.close()
-        conn.commit()
+        if commit:
+            conn.commit()
         return ok(count)
+    except KeyError as e:
+        if cursor:
+            cursor.close()
+        return err(f"db.insert({table}, ...) missing value for column {e}")
     except sqlite3.Error as e:
         if cursor:
             cursor.close()
         return err(f"db.insert({table}, ...) sqlite3 error: {e}")
 
 
-def insert_or_ignore(conn: sqlite3.Connection, table: str, data: list[dict[str, Any]]) -> Result[int, str]:
+def insert_or_ignore(conn: sqlite3.Connection, table: str, data: list[dict[str, Any]], commit: bool = True) -> Result[int, str]:
     if not data:
         return ok(0)
 
     cursor = None
     try:
-        key_str = ", ".join(data[0].keys())
-        val_str = ", ".join(f":{k}" for k in data[0].keys())
-        query = f"INSERT OR IGNORE INTO {table} ({key_str}) VALUES ({val_str});"
-
         cursor = conn.cursor()
-        cursor.executemany(query, data)
-        count = cursor.rowcount
+        count = _insert_rows(cursor, "INSERT OR IGNORE", table, data)
         cursor.close()
-        conn.commit()
+        if commit:
+            conn.commit()
         return ok(count)
+    except KeyError as e:
+        if cursor:
+            cursor.close()
+        return err(f"db.insert_or_ignore({table}, ...) missing value for column {e}")
     except sqlite3.Error as e:
         if cursor:
             cursor.close()
         return err(f"db.insert_or_ignore({table}, ...) sqlite3 error: {e}")
 
 
+# INSERT ... RETURNING needs SQLite 3.35+
+_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+
+def insert_returning(conn: sqlite3.Connection, table: str, data: list[dict[str, Any]], key: list[str], returning: str, commit: bool = True) -> Result[dict[tuple, Any], str]:
+    """
+    Insert rows that don't exist yet and return a column for every row.
+
+    Rows conflicting on the unique 'key' columns, or failing any other
+    constraint, are left untouched (INSERT OR IGNORE), so re-inserting
+    existing rows writes nothing. Returns {tuple of key values: returning
+    value} for every row that is now present, inserted or pre-existing.
+    With SQLite 3.35+ new rows come back through RETURNING and only the
+    remaining keys are looked up; older versions do a plain multi-row
+    insert and look up every key.
+    """
+    if not data:
+        return ok({})
+
+    columns = list(data[0].keys())
+    key_str = ", ".join(key)
+    out_str = f"{key_str}, {returning}"
+    step = max(1, _MAX_PARAMS // max(len(columns), len(key)))
+
+    cursor = None
+    try:
+        cursor = conn.cursor()
+        found = {}
+
+        if _HAS_RETURNING:
+            col_str = ", ".join(columns)
+            row_str = "(" + ", ".join("?" * len(columns)) + ")"
+            for i in range(0, len(data), step):
+                chunk = data[i:i + step]
+                query = (
+                    f"INSERT OR IGNORE INTO {table} ({col_str}) VALUES {', '.join([row_str] * len(chunk))} "
+                    f"RETURNING {out_str}"
+                )
+                cursor.execute(query, [row[c] for row in chunk for c in columns])
+                for *values, value in cursor.fetchall():
+                    found[tuple(values)] = value
+        else:
+            _insert_rows(cursor, "INSERT OR IGNORE", table, data)
+
+        # Pre-existing rows (all rows, without RETURNING) are looked up
+        keys = [k for k in dict.fromkeys(tuple(row[k] for k in key) for row in data) if k not in found]
+        row_str = "(" + ", ".join("?" * len(key)) + ")"
+        for i in range(0, len(keys), step):
+            chunk = keys[i:i + step]
+            query = (
+                f"SELECT {out_str} FROM {table} "
+                f"WHERE ({key_str}) IN (VALUES {', '.join([row_str] * len(chunk))})"
+            )
+            cursor.execute(query, [v for k in chunk for v in k])
+            for *values, value in cursor.fetchall():
+                found[tuple(values)] = value
+
+        cursor.close()
+        if commit:
+            conn.commit()
+        return ok(found)
+    except sqlite3.Error as e:
+        if cursor:
+            cursor.close()
+        return err(f"db.insert_returning({table}, ...) sqlite3 error: {e}")
+
+
 def delete(conn: sqlite3.Connection, table: str, key: str, values: list[Any]) -> Result[int, str]:
     if not values:
         return ok(0)
 
     cursor = None
     try:
-        params = tuple(set(values))
-        places = ",".join("?" for _ in params)
-        query = f"DELETE FROM {table} WHERE {key} IN ({places})"
+        # One bound JSON array: fixed statement text for any number of
+        # values, and no bound-parameter limit. IN ignores duplicates, so
+        # the values are passed through as given.
+        query = f"DELETE FROM {table} WHERE {key} IN (SELECT value FROM json_each(?))"
 
         cursor = conn.cursor()
-        cursor.execute(query, params)
+        cursor.execute(query, (json.dumps(list(values)),))
         count = cursor.rowcount
         cursor.close()
         conn.commit()
@@ -11,8 +11,25 @@ from .cli.shared import Cmd
 from .result import Result, ok, err, is_ok, is_not_ok
 
 
-def add_arguments(parser):
-    """Define the CLI interface and register all available subcommands."""
+# Subcommands, each registered by edgar.cli.<name>.add_arguments()
+SUBCOMMANDS = ("init", "build", "setup", "add", "new", "probe", "select", "delete",
+               "modify", "update", "report", "calc", "agg", "stats", "export")
+
+# Table themes accepted by --theme (kept ordered for argparse's error message)
+THEMES = ("default", "financial", "financial-light", "financial-dark",
+          "minimal", "minimal-light", "minimal-dark", "grid", "grid-light",
+          "grid-dark", "nobox", "nobox-light", "nobox-dark", "nobox-minimal",
+          "nobox-minimal-light", "nobox-minimal-dark")
+
+
+def add_arguments(parser, argv: list[str] | None = None):
+    """
+    Define the CLI interface and register the subcommands.
+
+    When the subcommand can be read from argv only that one is registered,
+    so only its module is imported. Otherwise (top-level help, no command,
+    unknown command) all of them are, and argparse reports as usual.
+    """
 
     # Global options for main edgar command
     parser.add_argument("-d", "--debug", action="store_true", help="print pipeline data to stderr")
@@ -25,33 +42,32 @@ def add_arguments(parser):
     format_group.add_argument("--tsv", action="store_true", help="output in TSV format (gnuplot native format)")
 
     parser.add_argument("--theme", metavar="X",
-                        choices=["default", "financial", "financial-light",
-                                 "financial-dark", "minimal", "minimal-light",
-                                 "minimal-dark", "grid", "grid-light",
-                                 "grid-dark", "nobox", "nobox-light",
-                                 "nobox-dark", "nobox-minimal",
-                                 "nobox-minimal-light", "nobox-minimal-dark"],
+                        choices=THEMES,
                         help="table theme for output formatting")
 
     # Subcommand parsers
     subparsers = parser.add_subparsers()
 
     # Register subcommands from their respective modules
-    cli.init.add_arguments(subparsers)
-    cli.build.add_arguments(subparsers)
-    cli.setup.add_arguments(subparsers)
-    cli.add.add_arguments(subparsers)
-    cli.new.add_arguments(subparsers)
-    cli.probe.add_arguments(subparsers)
-    cli.select.add_arguments(subparsers)
-    cli.delete.add_arguments(subparsers)
-    cli.modify.add_arguments(subparsers)
-    cli.update.add_arguments(subparsers)
-    cli.report.add_arguments(subparsers)
-    cli.calc.add_arguments(subparsers)
-    cli.agg.add_arguments(subparsers)
-    cli.stats.add_arguments(subparsers)
-    cli.export.add_arguments(subparsers)
+    command = _find_subcommand(sys.argv[1:] if argv is None else argv)
+    for name in ([command] if command else SUBCOMMANDS):
+        getattr(cli, name).add_arguments(subparsers)
+
+
+def _find_subcommand(argv: list[str]) -> str | None:
+    """
+    Return the subcommand named by the first positional argument, skipping
+    global flags and the --theme value, or None if there is none.
+    """
+    skip_value = False
+    for token in argv:
+        if skip_value:
+            skip_value = False
+        elif token == "--theme":
+            skip_value = True
+        elif not token.startswith("-"):
+            return token if token in SUBCOMMANDS else None
+    return None
 
 
 def get_output_format(args):
@@ -151,12 +167,14 @@ def cli_main(args):
                 pipeline.write(output_packet, context)
             else:
                 # Terminal output - format according to user preference or auto-detection
+                # Text formats are written row by row rather than built
+                # into one string first
                 if output_format == 'json':
-                    print(cli.format.as_json(result[1]["data"]))
+                    cli.format.write_json(result[1]["data"], sys.stdout)
                 elif output_format == 'csv':
-                    print(cli.format.as_csv(result[1]["data"]))
+                    cli.format.write_csv(result[1]["data"], sys.stdout)
                 elif output_format == 'tsv':
-                    print(cli.format.as_tsv(result[1]["data"]))
+                    cli.format.write_tsv(result[1]["data"], sys.stdout)
                 else:  # table or default
                     theme_name = args.theme if args.theme else None
                     print(cli.format.as_table(result[1]["data"], theme_name))
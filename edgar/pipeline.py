@@ -4,23 +4,83 @@ pipeline.py - Pipeline orchestration and packet envelope management
 
 import sys
 import json
+import math
 import shlex
+from functools import lru_cache
 from typing import Any, TypedDict
 
+# Optional: orjson encodes and decodes packets several times faster than
+# the stdlib (pip install edgar-pipes[fast]). Packets must not depend on
+# whether it is installed, so anything orjson would write or read
+# differently from json goes through json instead.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Local modules
 from edgar import result
 from edgar.result import Result
 from edgar.cli.shared import Cmd
 
 
+def _has_nonfinite(obj: Any) -> bool:
+    """True if obj holds a NaN or infinite float, which orjson writes as null."""
+    if isinstance(obj, float):
+        return not math.isfinite(obj)
+    if isinstance(obj, dict):
+        return any(_has_nonfinite(k) or _has_nonfinite(v) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return any(_has_nonfinite(v) for v in obj)
+    return False
+
+
+def _dumps(obj: Any) -> str:
+    """
+    Serialize a packet envelope to a single line of JSON.
+
+    orjson output is used only when json would produce the same packet:
+    non-str keys are coerced to strings as json does, and output that is
+    not ASCII (json escapes it) or may hold NaN/Infinity (orjson writes
+    null) is redone with json.
+    """
+    if orjson is not None:
+        try:
+            encoded = orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # orjson.JSONEncodeError, e.g. an int wider than 64 bits
+            encoded = None
+        if encoded is not None and encoded.isascii() and not (b"null" in encoded and _has_nonfinite(obj)):
+            return encoded.decode()
+    return json.dumps(obj)
+
+
+def _loads(line: bytes) -> Any:
+    """
+    Parse one line of JSON (both parsers take UTF-8 bytes directly).
+
+    Input orjson rejects but json accepts, such as NaN or ints wider than
+    64 bits, is parsed by json; genuinely bad input raises
+    json.JSONDecodeError from either path.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(line)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(line)
+
+
 class Packet(TypedDict):
     cmd: Cmd
     pipeline: list[str]
 
 
+@lru_cache(maxsize=1)
 def output_format() -> str:
     """
-    Smart format detection based on terminal context.
+    Smart format detection based on terminal context. Checked once per
+    process: stdout doesn't change between the calls made for one command.
     
     Returns:
         'table' if outputting to terminal (human-readable)
@@ -34,12 +94,12 @@ def output_format() -> str:
 
 def ok(cmd_name: str, data: list[dict]) -> str:
     """Create successful packet record in JSON envelope format."""
-    return json.dumps({"ok": True, "name": cmd_name, "data": data})
+    return _dumps({"ok": True, "name": cmd_name, "data": data})
 
 
 def err(message: str) -> str:
     """Create error packet record in JSON envelope format."""
-    return json.dumps({"ok": False, "name": "error", "data": message})
+    return _dumps({"ok": False, "name": "error", "data": message})
 
 
 def read() -> Result[tuple[Packet | None, dict], str]:
@@ -60,14 +120,15 @@ def read() -> Result[tuple[Packet | None, dict], str]:
     if sys.stdin.isatty():
         return result.ok((None, {}))  # No piped input - start of pipeline
 
-    # Read first non-empty line as single packet
-    line = sys.stdin.readline().strip()
+    # Read first line as single packet, as bytes: the JSON parser decodes
+    # it, so the text layer would only add a second decoding pass
+    line = sys.stdin.buffer.readline().strip()
 
     if not line:
         return result.ok((None, {}))  # Empty input
 
     try:
-        envelope = json.loads(line)
+        envelope = _loads(line)
     except json.JSONDecodeError as e:
         return result.err(f"pipeline.read: invalid JSON - {e}")
 
@@ -123,7 +184,7 @@ def write(packet: Packet, context: dict) -> None:
         "data": packet["cmd"]["data"],
         "context": context_out
     }
-    print(json.dumps(envelope))
+    print(_dumps(envelope))
 
 
 def add(packet: Packet | None, current_command: str) -> Packet:
@@ -135,8 +196,10 @@ def add(packet: Packet | None, current_command: str) -> Packet:
             "pipeline": [current_command]
         }
     else:
-        # Continue existing pipeline
+        # Continue existing pipeline; the caller owns the packet read from
+        # stdin, so its history is extended in place rather than copied
+        packet["pipeline"].append(current_command)
         return {
             "cmd": packet["cmd"],
-            "pipeline": packet["pipeline"] + [current_command]
+            "pipeline": packet["pipeline"]
         }
@@ -16,9 +16,14 @@ U = TypeVar('U')
 # Result is just a tuple: (success: bool, value_or_error)
 Result = Tuple[bool, Union[T, E]]
 
+# Shared ok(None): writers return it on every call, and tuples are immutable
+_OK_NONE = (True, None)
+
 
 def ok(value: T) -> Result[T, E]:
     """Create a successful Result containing the given value."""
+    if value is None:
+        return _OK_NONE
     return (True, value)
 
 
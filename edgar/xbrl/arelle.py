@@ -1,8 +1,14 @@
+from __future__ import annotations
+
 import os
 import sys
-from arelle import Cntlr
-from arelle.ModelXbrl import ModelXbrl
 from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any, Iterator
+
+# Arelle is imported on first load_model() so that commands which never
+# open a filing don't pay for loading it
+if TYPE_CHECKING:
+    from arelle.ModelXbrl import ModelXbrl
 
 # Local
 from edgar import xbrl
@@ -11,12 +17,23 @@ from edgar.result import Result, ok, err
 
 PRESENTATION_ARCROLE = "http://www.xbrl.org/2003/arcrole/parent-child"
 
+# DEI concept local names -> dei table columns
+_DEI_FIELDS = {
+    "DocumentType": "doc_type",
+    "DocumentPeriodEndDate": "doc_period_end",
+    "DocumentFiscalPeriodFocus": "fiscal_period",
+    "DocumentFiscalYearFocus": "fiscal_year",
+    "CurrentFiscalYearEndDate": "fiscal_month_day_end",
+    "EntityReportingCalendarYearStartDate": "fiscal_month_day_start"
+}
+
 
 def load_model(file_url: str) -> Result[ModelXbrl, str]:
     """
     Load XBRL model from URL using Arelle library.
     """
     try:
+        from arelle import Cntlr
         cntlr = Cntlr.Cntlr(logFileName=os.devnull)
         model = cntlr.modelManager.load(file_url)
         
@@ -34,9 +51,10 @@ def _get_role_uri(model: ModelXbrl, tail: str) -> str | None:
     Find full role URI by matching the tail portion.
     Returns the full URI if found, None if not found.
     """
+    tail = tail.lower()
     for roleType in model.roleTypes:
         uri_tail = roleType.rsplit("/", 1)[-1]
-        if uri_tail.lower() == tail.lower():
+        if uri_tail.lower() == tail:
             return roleType
     return None
 
@@ -47,84 +65,99 @@ def extract_roles(model: ModelXbrl) -> list[str]:
     return [uri.rsplit("/", 1)[-1] for uri in model.roleTypes]
 
 
-def extract_facts_by_role(model: ModelXbrl, role_tail: str) -> list:
+def _walk_role(model: ModelXbrl, role_tail: str) -> Iterator[tuple[Any, Any]]:
     """
-    Extract all facts for a specific role from the XBRL model.
+    Walk the presentation tree of a role, yielding (qname, facts) for each
+    concept once, in walk order. Yields nothing for an unknown role.
     """
     role_uri = _get_role_uri(model, role_tail)
     if not role_uri:
-        return []
+        return
 
     rs = model.relationshipSet(PRESENTATION_ARCROLE, linkrole=role_uri)
     if not rs:
-        return []
+        return
 
-    out = []
     seen = set()
 
+    # Bound once: the walk below runs for every concept in the role
+    facts_by_qname = model.factsByQname
+    children = rs.fromModelObject
+
     for root in rs.rootConcepts:
         stack = [root]
         while stack:
             concept = stack.pop()
-            if concept.qname in seen:
+            qname = concept.qname
+            if qname in seen:
                 continue
-            seen.add(concept.qname)
-            out.extend(model.factsByQname.get(concept.qname, []))
-            for rel in rs.fromModelObject(concept):
-                stack.append(rel.toModelObject)
+            seen.add(qname)
+            yield qname, facts_by_qname.get(qname, ())
+            stack.extend(rel.toModelObject for rel in children(concept))
+
 
+def extract_facts_by_role(model: ModelXbrl, role_tail: str) -> list:
+    """
+    Extract all facts for a specific role from the XBRL model.
+    """
+    out = []
+    for _, facts in _walk_role(model, role_tail):
+        out.extend(facts)
     return out
 
 
 def extract_concepts_by_role(model: ModelXbrl, role: str) -> list[dict[str, str]]:
     """
     Extract unique concept definitions for a specific role.
+
+    Concepts come straight from the tree walk, which already visits each
+    one once, described by their first fact; concepts without facts are
+    skipped.
     """
-    facts = extract_facts_by_role(model, role)
-    seen = set()
     out = []
 
-    for f in facts:
-        key = (f.qname.namespaceURI, f.qname.localName)
-        if key not in seen:
-            seen.add(key)
-            taxonomy, tag = xbrl.facts.get_concept(f)
-            out.append({
-                "taxonomy": taxonomy,
-                "tag": tag,
-                "name": f.concept.label(),
-                "balance": f.concept.balance,  # Extract balance attribute (debit/credit/None)
-            })
+    for _, facts in _walk_role(model, role):
+        f = next(iter(facts), None)
+        if f is None:
+            continue
+        taxonomy, tag = xbrl.facts.get_concept(f)
+        out.append({
+            "taxonomy": taxonomy,
+            "tag": tag,
+            "name": f.concept.label(),
+            "balance": f.concept.balance,  # Extract balance attribute (debit/credit/None)
+        })
 
     return out
 
 
+def _to_month_day(s: str) -> str | None:
+    """Normalize an XBRL --MM-DD value to MM-DD, or None if malformed."""
+    try:
+        s = s.lstrip("-")
+        return datetime.strptime(s, "%m-%d").strftime("%m-%d")
+    except Exception:
+        return None
+
+
 def extract_dei(model: ModelXbrl, access_no: str) -> dict[str, str]:
     """
     Extract Document Entity Information from XBRL model.
     Returns available DEI data, handling malformed dates gracefully.
     """
-    def to_month_day(s: str) -> str | None:
-        try:
-            s = s.lstrip("-")
-            return datetime.strptime(s, "%m-%d").strftime("%m-%d")
-        except Exception:
-            return None
-
-    fields = {
-        "DocumentType": "doc_type",
-        "DocumentPeriodEndDate": "doc_period_end",
-        "DocumentFiscalPeriodFocus": "fiscal_period",
-        "DocumentFiscalYearFocus": "fiscal_year",
-        "CurrentFiscalYearEndDate": "fiscal_month_day_end",
-        "EntityReportingCalendarYearStartDate": "fiscal_month_day_start"
-    }
-
     dei = {"access_no": access_no}
 
-    for fact in model.facts:
-        if fact.qname.localName in fields and "dei" in fact.qname.namespaceURI:
-            dei[fields[fact.qname.localName]] = fact.value
+    # Match on the model's distinct concept names rather than on every
+    # fact, then apply the few DEI facts in document order so the last
+    # one still wins, as when scanning model.facts
+    dei_facts = [
+        fact
+        for qname, facts in model.factsByQname.items()
+        if qname.localName in _DEI_FIELDS and "dei" in qname.namespaceURI
+        for fact in facts
+    ]
+    for fact in sorted(dei_facts, key=lambda f: f.objectIndex):
+        dei[_DEI_FIELDS[fact.qname.localName]] = fact.value
 
     # Validate doc_period_end date format
     try:
@@ -134,11 +167,11 @@ def extract_dei(model: ModelXbrl, access_no: str) -> dict[str, str]:
 
     # Normalize fiscal dates
     if "fiscal_month_day_end" in dei:
-        if s := to_month_day(dei["fiscal_month_day_end"]):
+        if s := _to_month_day(dei["fiscal_month_day_end"]):
             dei["fiscal_month_day_end"] = s
 
     if "fiscal_month_day_start" in dei:
-        if s := to_month_day(dei["fiscal_month_day_start"]):
+        if s := _to_month_day(dei["fiscal_month_day_start"]):
             dei["fiscal_month_day_start"] = s
 
     # Calculate missing fiscal dates
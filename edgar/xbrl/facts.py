@@ -1,17 +1,19 @@
+from datetime import date, datetime
+from functools import lru_cache
+
+
+# Period mode by duration in days, for every duration up to a year and a bit
+_MODE_BY_DAYS = ["period"] * 374
+_MODE_BY_DAYS[1] = "instant"
+_MODE_BY_DAYS[88:96] = ["quarter"] * 8
+_MODE_BY_DAYS[170:186] = ["semester"] * 16
+_MODE_BY_DAYS[260:276] = ["threeQ"] * 16
+_MODE_BY_DAYS[350:374] = ["year"] * 24
+
+
 def _mode_from_days(days: int) -> str:
     """Private helper: classify period mode based on duration in days."""
-    if days == 1:
-        return "instant"
-    elif 88 <= days <= 95:
-        return "quarter"
-    elif 170 <= days <= 185:
-        return "semester"
-    elif 260 <= days <= 275:
-        return "threeQ"
-    elif 350 <= days <= 373:
-        return "year"
-    else:
-        return "period"
+    return _MODE_BY_DAYS[days] if 0 <= days < 374 else "period"
 
 
 def get_concept(fact) -> tuple[str, str]:
@@ -24,6 +26,7 @@ def get_concept(fact) -> tuple[str, str]:
     return taxonomy_uri, tag
 
 
+@lru_cache(maxsize=512)
 def taxonomy_name(taxonomy_uri: str) -> str:
     """
     Extract taxonomy name with version from URI.
@@ -56,25 +59,31 @@ def make_record(fact, access_no: str, role: str, concept_id: int) -> dict:
     else:
         return {}
 
-    try:
-        unit = fact.unit.measures[0][0].localName if fact.unit is not None else None
-    except Exception:
-        unit = None
+    # measures is (numerators, denominators); take the first numerator
+    fact_unit = fact.unit
+    measures = fact_unit.measures if fact_unit is not None else None
+    unit = measures[0][0].localName if measures and measures[0] else None
 
     # Extract decimals attribute for scale information
-    try:
-        decimals = str(fact.decimals) if fact.decimals is not None else None
-    except Exception:
-        decimals = None
-
-    dimensions = {
-        dim.dimensionQname.localName: dim.memberQname.localName
-        for dim in getattr(ctx, 'dims', {}).values()
-    }
-
-    try:
-        value = float(fact.value)
-    except Exception:
+    decimals = fact.decimals
+    decimals = str(decimals) if decimals is not None else None
+
+    # Consolidated facts carry no dimensions. The few others are filled in
+    # a plain loop, which on 3.11 skips the comprehension's function frame
+    dimensions = {}
+    dims = getattr(ctx, 'dims', None)
+    if dims:
+        for dim in dims.values():
+            dimensions[dim.dimensionQname.localName] = dim.memberQname.localName
+
+    # Text facts are common, so skip the raising float() for empty values
+    value = fact.value
+    if value:
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            value = None
+    else:
         value = None
 
     return {
@@ -99,16 +108,20 @@ def is_consolidated(fact) -> bool:
     ctx = fact.context
     if ctx is None:
         return False
-    dims = getattr(ctx, "dims", None)
-    return not getattr(ctx, "hasSegment", False) and (dims is None or len(dims) == 0)
+    if getattr(ctx, "hasSegment", False):
+        return False
+    return not getattr(ctx, "dims", None)
 
 
-def _date_distance(end_date, doc_period_end_str):
+def _date_distance(end_date, doc_period_end_str, doc_dt=None):
     """
     Calculate absolute difference between fact end_date and doc_period_end string.
-    Returns difference in days as integer for sorting.
+    Returns difference in days as integer for sorting. doc_dt is the already
+    parsed doc_period_end, when the caller has it.
     """
-    from datetime import datetime, date
+    # Fast path: a date against an already parsed doc_period_end
+    if doc_dt is not None and type(end_date) is date:
+        return abs((end_date - doc_dt).days)
 
     # Convert end_date to ISO string for comparison
     if hasattr(end_date, 'isoformat'):
@@ -126,6 +139,28 @@ def _date_distance(end_date, doc_period_end_str):
         return 0 if end_date_str == doc_period_end_str else 999999
 
 
+def _closest(candidates, doc_period_end):
+    """
+    Return the candidate whose end_date is closest to doc_period_end, the
+    first one on ties. doc_period_end is parsed once and an exact match
+    ends the scan.
+    """
+    try:
+        doc_dt = datetime.fromisoformat(doc_period_end).date()
+    except (TypeError, ValueError):
+        doc_dt = None
+
+    best = None
+    best_days = None
+    for f in candidates:
+        days = _date_distance(f["end_date"], doc_period_end, doc_dt)
+        if days == 0:
+            return f
+        if best_days is None or days < best_days:
+            best, best_days = f, days
+    return best
+
+
 def get_best_q1(facts, past_periods=None, doc_period_end=None) -> dict | None:
     """
     Get best Q1 fact from collection.
@@ -137,7 +172,7 @@ def get_best_q1(facts, past_periods=None, doc_period_end=None) -> dict | None:
 
     # If doc_period_end provided, prefer fact with closest end_date
     if doc_period_end:
-        return min(candidates, key=lambda f: _date_distance(f["end_date"], doc_period_end))
+        return _closest(candidates, doc_period_end)
 
     return candidates[0]
 
@@ -153,19 +188,24 @@ def get_best_q2(facts, past_periods=None, doc_period_end=None) -> dict | None:
     has_q1 = any(p == "Q1" for _, p in past_periods)
 
     # Look for direct quarter facts first
-    quarter_candidates = [f for f in facts if f["mode"] == "quarter"]
-    semester_candidates = [f for f in facts if f["mode"] == "semester"]
+    quarter_candidates = []
+    semester_candidates = []
+    for f in facts:
+        if f["mode"] == "quarter":
+            quarter_candidates.append(f)
+        elif f["mode"] == "semester":
+            semester_candidates.append(f)
 
     # Prefer quarter mode if available (direct Q2 reporting)
     if quarter_candidates:
         if doc_period_end:
-            return min(quarter_candidates, key=lambda f: _date_distance(f["end_date"], doc_period_end))
+            return _closest(quarter_candidates, doc_period_end)
         return quarter_candidates[0]
 
     # Fall back to semester (6M YTD) only if we have Q1 and no quarter fact
     if semester_candidates and has_q1:
         if doc_period_end:
-            return min(semester_candidates, key=lambda f: _date_distance(f["end_date"], doc_period_end))
+            return _closest(semester_candidates, doc_period_end)
         return semester_candidates[0]
 
     # No suitable facts found
@@ -179,38 +219,33 @@ def get_best_q3(facts, past_periods=None, doc_period_end=None) -> dict | None:
     """
     past_periods = past_periods or []
     past = {(m, p) for m, p in past_periods}
-    options = [f for f in facts if f["mode"] in ("threeQ", "quarter")]
-
-    if not options:
-        return None
-
-    # If doc_period_end provided, filter options to those closest to it first
-    if doc_period_end:
-        # Group by mode, then pick closest within each mode
-        threeQ_options = [f for f in options if f["mode"] == "threeQ"]
-        quarter_options = [f for f in options if f["mode"] == "quarter"]
 
-        # Pick best threeQ if available and applicable
-        if threeQ_options and (("semester", "Q2") in past or (("quarter", "Q1") in past and ("quarter", "Q2") in past)):
-            return min(threeQ_options, key=lambda f: _date_distance(f["end_date"], doc_period_end))
+    # Bucket candidates by mode in one pass
+    threeQ_options = []
+    quarter_options = []
+    for f in facts:
+        if f["mode"] == "threeQ":
+            threeQ_options.append(f)
+        elif f["mode"] == "quarter":
+            quarter_options.append(f)
 
-        # Otherwise pick best quarter
-        if quarter_options:
-            return min(quarter_options, key=lambda f: _date_distance(f["end_date"], doc_period_end))
+    if not threeQ_options and not quarter_options:
+        return None
 
-        # Fallback to any option
-        return min(options, key=lambda f: _date_distance(f["end_date"], doc_period_end))
+    # threeQ (9M YTD) is preferred when the earlier quarters are known,
+    # then a direct quarter fact, else whatever threeQ facts exist
+    if threeQ_options and (("semester", "Q2") in past or (("quarter", "Q1") in past and ("quarter", "Q2") in past)):
+        options = threeQ_options
+    elif quarter_options:
+        options = quarter_options
+    else:
+        options = threeQ_options
 
-    # Original logic without doc_period_end
-    def rank(f):
-        if f["mode"] == "threeQ":
-            if ("semester", "Q2") in past or (("quarter", "Q1") in past and ("quarter", "Q2") in past):
-                return 0
-        if f["mode"] == "quarter":
-            return 1
-        return 99
+    # If doc_period_end provided, pick the option closest to it
+    if doc_period_end:
+        return _closest(options, doc_period_end)
 
-    return min(options, key=rank, default=None)
+    return options[0]
 
 
 def get_best_fy(facts, past_periods=None, doc_period_end=None) -> dict | None:
@@ -218,25 +253,26 @@ def get_best_fy(facts, past_periods=None, doc_period_end=None) -> dict | None:
     Get best full-year fact from collection.
     Prefers facts with end_date closest to doc_period_end if provided.
     """
-    options = [f for f in facts if f.get("mode") in ("year", "quarter", "period")]
+    # Bucket candidates by mode in one pass
+    year_options = []
+    quarter_options = []
+    period_options = []
+    for f in facts:
+        mode = f.get("mode")
+        if mode == "year":
+            year_options.append(f)
+        elif mode == "quarter":
+            quarter_options.append(f)
+        elif mode == "period":
+            period_options.append(f)
+
+    # Prefer year, then quarter, then period
+    options = year_options or quarter_options or period_options
     if not options:
         return None
 
-    # If doc_period_end provided, filter by mode preference then by date distance
+    # If doc_period_end provided, pick the option closest to it
     if doc_period_end:
-        # Group by mode
-        year_options = [f for f in options if f.get("mode") == "year"]
-        quarter_options = [f for f in options if f.get("mode") == "quarter"]
-        period_options = [f for f in options if f.get("mode") == "period"]
-
-        # Prefer year mode, pick closest to doc_period_end
-        if year_options:
-            return min(year_options, key=lambda f: _date_distance(f["end_date"], doc_period_end))
-        if quarter_options:
-            return min(quarter_options, key=lambda f: _date_distance(f["end_date"], doc_period_end))
-        if period_options:
-            return min(period_options, key=lambda f: _date_distance(f["end_date"], doc_period_end))
-
-    # Fallback to mode preference without date filtering
-    rank = {"year": 0, "quarter": 1, "period": 2}
-    return min(options, key=lambda f: rank.get(f["mode"], 99), default=None)
+        return _closest(options, doc_period_end)
+
+    return options[0]
@@ -1,15 +1,42 @@
+import re
+import threading
 import requests
+from functools import lru_cache
 from typing import Any
 from urllib3.util.retry import Retry
 from requests.adapters import HTTPAdapter
 
+# Optional: orjson parses the multi-megabyte SEC payloads (company tickers,
+# submissions) several times faster, straight from the response bytes
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Local modules
 from edgar.result import Result, ok, err, is_not_ok
 
+
 # Setup session with retries
-session = requests.Session()
-retries = Retry(total=3, backoff_factor=0.5)
-session.mount("https://", HTTPAdapter(max_retries=retries))
+def _make_session() -> requests.Session:
+    new_session = requests.Session()
+    retries = Retry(total=3, backoff_factor=0.5)
+    new_session.mount("https://", HTTPAdapter(max_retries=retries))
+    return new_session
+
+
+session = _make_session()
+
+# Sessions for worker threads; requests.Session is not thread-safe
+_thread_local = threading.local()
+
+
+def _thread_session() -> requests.Session:
+    """Return this thread's session, creating it on first use."""
+    thread_session = getattr(_thread_local, "session", None)
+    if thread_session is None:
+        thread_session = _thread_local.session = _make_session()
+    return thread_session
 
 
 def fetch_json(user_agent: str, url: str, timeout: int = 30) -> Result[Any, str]:
@@ -19,6 +46,8 @@ def fetch_json(user_agent: str, url: str, timeout: int = 30) -> Result[Any, str]
     try:
         response = session.get(url, headers={"User-Agent": user_agent}, timeout=timeout)
         response.raise_for_status()
+        if orjson is not None:
+            return ok(orjson.loads(response.content))
         return ok(response.json())
     except requests.exceptions.Timeout:
         return err(f"net.fetch_json() timeout after {timeout}s")
@@ -50,15 +79,45 @@ def fetch_text(user_agent: str, url: str, timeout: int = 30) -> Result[str, str]
         return err(f"net.fetch_text() request failed: {e}")
 
 
-def check_content(user_agent: str, url: str, patterns: list[str], timeout: int = 30) -> Result[bool, str]:
+@lru_cache(maxsize=16)
+def _pattern_matcher(patterns: tuple[str, ...]) -> re.Pattern:
+    """Compile literal patterns into one alternation, so content is scanned once."""
+    return re.compile(b"|".join(re.escape(p.encode()) for p in patterns))
+
+
+def check_content(user_agent: str, url: str, patterns: list[str], timeout: int = 30,
+                  stop: threading.Event | None = None) -> Result[bool, str]:
     """
     Check if URL content contains any of the specified patterns.
     Returns True if any pattern is found, False if none are found.
+
+    The body is streamed on this thread's own session and the download
+    stops at the first match. Setting stop abandons the download early,
+    returning False; callers probing several URLs use it to drop the
+    probes they no longer need.
     """
-    result = fetch_text(user_agent, url, timeout)
-    if is_not_ok(result):
-        return result
-    
-    content = result[1]
-    found = any(pattern in content for pattern in patterns)
-    return ok(found)
+    if not patterns:
+        return ok(False)
+
+    matcher = _pattern_matcher(tuple(patterns))
+    overlap = max(len(p.encode()) for p in patterns) - 1
+    try:
+        with _thread_session().get(url, headers={"User-Agent": user_agent}, timeout=timeout, stream=True) as response:
+            response.raise_for_status()
+            tail = b""
+            for chunk in response.iter_content(chunk_size=65536):
+                if stop is not None and stop.is_set():
+                    return ok(False)
+                window = tail + chunk
+                if matcher.search(window) is not None:
+                    return ok(True)
+                tail = window[-overlap:] if overlap else b""
+        return ok(False)
+    except requests.exceptions.Timeout:
+        return err(f"net.check_content() timeout after {timeout}s")
+    except requests.exceptions.ConnectionError:
+        return err(f"net.check_content() connection failed")
+    except requests.exceptions.HTTPError as e:
+        return err(f"net.check_content() HTTP {e.response.status_code}")
+    except requests.exceptions.RequestException as e:
+        return err(f"net.check_content() request failed: {e}")
@@ -1,8 +1,7 @@
 import sys
-import requests
+import threading
 from pathlib import Path
-from urllib3.util.retry import Retry
-from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
 
 # Local modules
 from edgar.result import Result, ok, err, is_ok, is_not_ok
@@ -13,11 +12,9 @@ URL_COMPANY_TICKERS = "https://www.sec.gov/files/company_tickers.json"
 URL_SUBMISSIONS_BY_CIK = "https://data.sec.gov/submissions/{}.json"
 URL_FILINGS_BY_CIK_ACCNO_URL = "https://www.sec.gov/Archives/edgar/data/{}/{}"
 
-
-# Setup session with retries
-session = requests.Session()
-retries = Retry(total=3, backoff_factor=0.5)
-session.mount("https://", HTTPAdapter(max_retries=retries))
+# Candidate files probed at once for XBRL content; kept well under SEC's
+# 10 requests/second fair-access limit
+PROBE_WORKERS = 4
 
 
 def fetch_entities_by_tickers(user_agent: str, tickers: list[str]) -> Result[list[dict], str]:
@@ -33,15 +30,22 @@ def fetch_entities_by_tickers(user_agent: str, tickers: list[str]) -> Result[lis
     entities = []
     
     for entity in data.values():
-        if not all(key in entity for key in ["ticker", "cik_str", "title"]):
+        # Match the ticker first; only the few selected rows need the rest.
+        # SEC tickers are uppercase, so upper() (a new string) is only
+        # needed for the odd row that is not
+        ticker = entity.get("ticker")
+        if ticker is None:
+            continue
+        if ticker not in selected and (ticker.isupper() or ticker.upper() not in selected):
+            continue
+        if "cik_str" not in entity or "title" not in entity:
             continue
-            
-        if entity["ticker"].upper() in selected:
-            entities.append({
-                "cik": f"{int(entity['cik_str']):010d}",
-                "ticker": entity["ticker"].lower(),
-                "name": entity["title"]
-            })
+
+        entities.append({
+            "cik": f"{int(entity['cik_str']):010d}",
+            "ticker": ticker.lower(),
+            "name": entity["title"]
+        })
     
     return ok(entities)
 
@@ -53,10 +57,20 @@ def _build_filing_url(cik: str, accno: str) -> str:
     return URL_FILINGS_BY_CIK_ACCNO_URL.format(cik, str(accno).replace("-", ""))
 
 
+# Filing directory listings by (cik, accno). A filed submission does not
+# change, so a listing fetched once is good for the rest of the process
+_filing_index_cache: dict[tuple[str, str], list[str]] = {}
+
+
 def _fetch_filing_index(user_agent: str, cik: str, accno: str) -> Result[list[str], str]:
     """
     Fetch list of files in a SEC filing directory.
+    Successful listings are cached in memory; errors are not.
     """
+    cached = _filing_index_cache.get((cik, accno))
+    if cached is not None:
+        return ok(cached)
+
     url = _build_filing_url(cik, accno) + "/index.json"
 
     result = net.fetch_json(user_agent, url)
@@ -71,7 +85,8 @@ def _fetch_filing_index(user_agent: str, cik: str, accno: str) -> Result[list[st
     for item in items:
         if isinstance(item, dict) and "name" in item:
             filenames.append(item["name"])
-    
+
+    _filing_index_cache[(cik, accno)] = filenames
     return ok(filenames)
 
 
@@ -86,26 +101,51 @@ def fetch_filing_xbrl_url(user_agent: str, cik: str, accno: str) -> Result[str |
 
     files = result[1]
 
-    # Prefer .xml files, then .htm/.html
-    preferred = sorted(
-        [f for f in files if f.endswith((".xml", ".htm", ".html"))],
-        key=lambda x: 0 if x.endswith(".xml") else 1
-    )
+    # Prefer .xml files, then .htm/.html, keeping index order within each
+    xml_files = []
+    html_files = []
+    for f in files:
+        if f.endswith(".xml"):
+            xml_files.append(f)
+        elif f.endswith((".htm", ".html")):
+            html_files.append(f)
+
+    # Check files for XBRL content a batch at a time, concurrently, and
+    # take the first hit in preference order (not the first to finish).
+    # Once a hit is taken, pending probes are cancelled and running ones
+    # stop at their next chunk.
+    base_url = _build_filing_url(cik, accno)
+    file_urls = [base_url + "/" + filename for filename in xml_files + html_files]
+    stop = threading.Event()
+
+    def probe(file_url: str) -> Result[bool, str]:
+        return net.check_content(user_agent, file_url, ["<xbrl", "<ix:"], stop=stop)
+
+    with ThreadPoolExecutor(max_workers=PROBE_WORKERS) as pool:
+        for start in range(0, len(file_urls), PROBE_WORKERS):
+            batch = file_urls[start:start + PROBE_WORKERS]
+            futures = [pool.submit(probe, file_url) for file_url in batch]
+            for file_url, future in zip(batch, futures):
+                result = future.result()
+                if is_ok(result) and result[1]:
+                    stop.set()
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    return ok(file_url)
 
-    # Check each file for XBRL content
-    for filename in preferred:
-        file_url = _build_filing_url(cik, accno) + "/" + filename
-
-        result = net.check_content(user_agent, file_url, ["<xbrl", "<ix:"])
-        if is_not_ok(result):
-            continue
-        
-        if result[1]:
-            return ok(file_url)
-    
     return ok(None)
 
 
+# Map SEC submission field names to our field names
+_FILING_FIELDS = {
+    "access_no": "accessionNumber",
+    "form_type": "form",
+    "primary_doc": "primaryDocument",
+    "filing_date": "filingDate",
+    "is_xbrl": "isXBRL",
+    "is_ixbrl": "isInlineXBRL"
+}
+
+
 def fetch_filings_by_cik(user_agent: str, cik: str, form_types: set[str]) -> Result[list[dict], str]:
     """
     Fetch all filings for a company from SEC API, filtered by form types.
@@ -120,23 +160,21 @@ def fetch_filings_by_cik(user_agent: str, cik: str, form_types: set[str]) -> Res
     data = result[1]
     recent = data.get("filings", {}).get("recent", {})
     
-    # Map SEC field names to our field names
-    field_mapping = {
-        "access_no": "accessionNumber", 
-        "form_type": "form", 
-        "primary_doc": "primaryDocument",
-        "filing_date": "filingDate", 
-        "is_xbrl": "isXBRL", 
-        "is_ixbrl": "isInlineXBRL"
-    }
-    
+    # Columns in _FILING_FIELDS order; form_type is checked before a row
+    # becomes a dict, since most filings are not of the requested types
+    keys = tuple(_FILING_FIELDS)
+    columns = [recent.get(field, []) for field in _FILING_FIELDS.values()]
+    form_index = keys.index("form_type")
+
     filings = []
-    for row in zip(*(recent.get(field_mapping[k], []) for k in field_mapping)):
+    for row in zip(*columns):
+        form_type = row[form_index]
+        if form_type not in form_types:
+            continue
+
         item = {"cik": cik}
-        item.update(dict(zip(field_mapping.keys(), row)))
-        
-        if item["form_type"] in form_types:
-            item["is_amendment"] = item["form_type"].endswith("/A")
-            filings.append(item)
+        item.update(zip(keys, row))
+        item["is_amendment"] = form_type.endswith("/A")
+        filings.append(item)
     
     return ok(filings)